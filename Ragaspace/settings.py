@@ -42,10 +42,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'main.middleware.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.ReplicaStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +56,7 @@ ROOT_URLCONF = 'Ragaspace.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'main.templating.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,10 +79,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN, where busy_timeout can wait for it,
+            # instead of failing when a read transaction tries to upgrade.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # A file-backed test database lets the concurrency tests open one
+        # connection per thread; in-memory SQLite cannot.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache, sessions and messages
+# LocMemCache is per process: fine for runserver, but gunicorn workers each get
+# their own. The production profile takes a shared backend from CACHE_URL.
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    # Kept apart so churn in the card fragments cannot evict sessions.
+    'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessions'},
+}
+
+# Sessions are read from the cache and written through to the database only
+# when they change.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Flash messages travel in a signed cookie, so adding one does not rewrite the session.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -116,6 +145,8 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATICFILES_DIRS = [BASE_DIR / 'static']
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -124,3 +155,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
+
+# Per-view query/latency histograms served on /metrics/ to staff users, or to
+# scrapers sending "Authorization: Bearer <METRICS_TOKEN>" when a token is set.
+METRICS_ENABLED = False
+METRICS_N_PLUS_ONE_THRESHOLD = 5
+METRICS_TOKEN = ''
+
+# PRAGMAs applied to every SQLite connection, on top of main.sqlite.DEFAULT_PRAGMAS
+# (WAL, synchronous=NORMAL, busy_timeout, mmap_size, cache_size). None drops one.
+SQLITE_PRAGMAS = {}
+
+# Unpaid bookings older than this are expired by `manage.py expire_bookings`.
+BOOKING_PAYMENT_TTL_MINUTES = 30
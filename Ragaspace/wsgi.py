@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Ragaspace.settings')
 
 application = get_wsgi_application()
+
+# Build the in-process search index before serving, rather than in the first
+# search request. Under gunicorn --preload the workers inherit it.
+from main.search import warm_index  # noqa: E402
+
+warm_index()
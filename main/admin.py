@@ -1,19 +1,39 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ERROR_FLAG
+from django.core.exceptions import PermissionDenied
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.urls import path, reverse
+from django.utils import timezone
 
-from .models import AddOn, Booking, Category, Review, Venue, WishlistItem
+from . import reservations, transfer
+from .forms import BookingAdminForm
+from .models import AddOn, AddOnBundle, Booking, Category, RateRule, Review, SlotClaim, Venue, WishlistItem
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ("name",)
+    list_display = ("name", "deposit_amount")
     search_fields = ("name",)
 
 
 @admin.register(Venue)
 class VenueAdmin(admin.ModelAdmin):
-    list_display = ("name", "city", "category", "price_per_hour")
+    list_display = ("name", "city", "category", "price_per_hour", "booking_count", "review_count")
     list_filter = ("city", "category")
     search_fields = ("name", "city")
+    readonly_fields = (
+        "booking_count",
+        "review_count",
+        "rating_sum",
+        "wishlist_count",
+        "rating_1",
+        "rating_2",
+        "rating_3",
+        "rating_4",
+        "rating_5",
+    )
 
 
 @admin.register(AddOn)
@@ -22,6 +42,20 @@ class AddOnAdmin(admin.ModelAdmin):
     search_fields = ("name", "venue__name")
 
 
+@admin.register(AddOnBundle)
+class AddOnBundleAdmin(admin.ModelAdmin):
+    list_display = ("name", "venue", "price")
+    search_fields = ("name", "venue__name")
+    filter_horizontal = ("addons",)
+
+
+@admin.register(RateRule)
+class RateRuleAdmin(admin.ModelAdmin):
+    list_display = ("name", "venue", "category", "days", "start_hour", "end_hour", "multiplier")
+    list_filter = ("days", "category")
+    search_fields = ("name", "venue__name")
+
+
 @admin.register(WishlistItem)
 class WishlistItemAdmin(admin.ModelAdmin):
     list_display = ("user", "venue", "created_at")
@@ -41,3 +75,66 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ("status", "date")
     search_fields = ("venue__name", "user__username")
     autocomplete_fields = ("venue", "user", "addons")
+    form = BookingAdminForm
+    export_chunk_size = 2000
+
+    def save_model(self, request, obj, form, change):
+        previous = obj.loaded_slot
+        super().save_model(request, obj, form, change)
+        # changeform_view runs in a transaction, so a lost race rolls the save back too.
+        if previous != obj.loaded_slot:
+            reservations.reclaim(obj)
+
+    def changeform_view(self, request, object_id=None, form_url="", extra_context=None):
+        try:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        except reservations.SlotUnavailable as exc:
+            # Another booking took the slot after the form validated; nothing was saved.
+            self.message_user(request, f"{exc} The booking was not saved.", level=messages.ERROR)
+            return redirect(request.get_full_path())
+
+    def get_urls(self):
+        export = path(
+            "export/",
+            self.admin_site.admin_view(self.export_csv_view),
+            name=f"{self.opts.app_label}_{self.opts.model_name}_export",
+        )
+        return [export, *super().get_urls()]
+
+    def export_csv_view(self, request: HttpRequest) -> HttpResponse:
+        """Stream every booking matching the changelist filters as CSV.
+
+        Rows are read with iterator(chunk_size=...), which also prefetches the
+        add-ons per chunk, and written as they are produced, so memory stays
+        flat and the first bytes go out before the last row is read.
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            # What the changelist itself does with filters it cannot apply.
+            changelist_url = reverse(
+                f"admin:{self.opts.app_label}_{self.opts.model_name}_changelist", current_app=self.admin_site.name
+            )
+            return redirect(f"{changelist_url}?{ERROR_FLAG}=1")
+        queryset = (
+            changelist.get_queryset(request)
+            .select_related("venue", "user")
+            .prefetch_related("addons")
+            .order_by("pk")
+        )
+        rows = transfer.export_rows("bookings", queryset, chunk_size=self.export_chunk_size)
+        # Notes and usernames are user input, and this file is opened in spreadsheets.
+        lines = transfer.iter_csv(rows, transfer.BOOKING_FIELDS, for_spreadsheets=True)
+        response = StreamingHttpResponse(lines, content_type="text/csv")
+        filename = f"bookings-{timezone.localdate():%Y%m%d}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+@admin.register(SlotClaim)
+class SlotClaimAdmin(admin.ModelAdmin):
+    list_display = ("venue", "date", "slot", "booking")
+    list_filter = ("date",)
+    raw_id_fields = ("booking",)
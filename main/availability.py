@@ -0,0 +1,152 @@
+"""Per-venue, per-date interval index for booking slot availability.
+
+Each (venue, date) pair is reduced to a sorted tuple of disjoint, merged
+``(start_minute, end_minute)`` intervals and kept in Django's cache, so a
+"is this slot free" check is a cache hit plus a binary search instead of an
+overlap query against the bookings table.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date as date_cls, time, timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Booking
+
+MINUTES_PER_DAY = 24 * 60
+CACHE_PREFIX = "availability"
+CACHE_TIMEOUT = 60 * 60
+
+Interval = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class FreeSlot:
+    date: date_cls
+    start: time
+    end: time
+
+
+def opening_minutes() -> Interval:
+    """Opening and closing time as minutes after midnight."""
+    opening = getattr(settings, "VENUE_OPENING_HOUR", 6)
+    closing = getattr(settings, "VENUE_CLOSING_HOUR", 24)
+    return opening * 60, closing * 60
+
+
+def _cache_key(venue_id: int, day: date_cls) -> str:
+    return f"{CACHE_PREFIX}:{venue_id}:{day.isoformat()}"
+
+
+def _to_minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes: int) -> time:
+    """Minutes after midnight as a ``time``; midnight at the end of the day becomes 23:59."""
+    if minutes >= MINUTES_PER_DAY:
+        return time(23, 59)
+    return time(minutes // 60, minutes % 60)
+
+
+def _merge(intervals: Iterable[Interval]) -> tuple[Interval, ...]:
+    merged: list[list[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple((start, end) for start, end in merged)
+
+
+def booking_intervals(day: date_cls, start_time: time, duration_hours: int) -> list[tuple[date_cls, Interval]]:
+    """Split a booking into per-date intervals, spilling past midnight into the next day."""
+    start = _to_minutes(start_time)
+    end = start + duration_hours * 60
+    parts = [(day, (start, min(end, MINUTES_PER_DAY)))]
+    day_offset = 1
+    while end > MINUTES_PER_DAY * day_offset:
+        spill_end = min(end - MINUTES_PER_DAY * day_offset, MINUTES_PER_DAY)
+        parts.append((day + timedelta(days=day_offset), (0, spill_end)))
+        day_offset += 1
+    return parts
+
+
+def _load_indexes(venue_id: int, days: list[date_cls]) -> dict[date_cls, tuple[Interval, ...]]:
+    # A booking lasts at most ``Booking.MAX_DURATION_HOURS``, so anything that
+    # spills into ``days`` started at most this many days earlier.
+    lookback = timedelta(days=-(-Booking.MAX_DURATION_HOURS // 24))
+    wanted = set(days)
+    rows = Booking.objects.filter(
+        venue_id=venue_id,
+        date__range=(min(days) - lookback, max(days)),
+        status__in=Booking.SLOT_HOLDING_STATUSES,
+    ).values_list("date", "start_time", "duration_hours")
+
+    intervals: dict[date_cls, list[Interval]] = defaultdict(list)
+    for booked_date, start_time, duration_hours in rows:
+        for day, interval in booking_intervals(booked_date, start_time, duration_hours):
+            if day in wanted:
+                intervals[day].append(interval)
+    return {day: _merge(intervals.get(day, ())) for day in days}
+
+
+def get_day_indexes(venue_id: int, days: Iterable[date_cls]) -> dict[date_cls, tuple[Interval, ...]]:
+    days = sorted(set(days))
+    keys = {_cache_key(venue_id, day): day for day in days}
+    cached = cache.get_many(keys.keys())
+    indexes = {keys[key]: value for key, value in cached.items()}
+
+    missing = [day for day in days if day not in indexes]
+    if missing:
+        loaded = _load_indexes(venue_id, missing)
+        cache.set_many({_cache_key(venue_id, day): value for day, value in loaded.items()}, CACHE_TIMEOUT)
+        indexes.update(loaded)
+    return indexes
+
+
+def _overlaps(index: tuple[Interval, ...], start: int, end: int) -> bool:
+    position = bisect_right(index, (start, MINUTES_PER_DAY + 1))
+    if position and index[position - 1][1] > start:
+        return True
+    return position < len(index) and index[position][0] < end
+
+
+def is_slot_free(venue_id: int, day: date_cls, start_time: time, duration_hours: int) -> bool:
+    parts = booking_intervals(day, start_time, duration_hours)
+    indexes = get_day_indexes(venue_id, [part_day for part_day, _ in parts])
+    return not any(_overlaps(indexes[part_day], start, end) for part_day, (start, end) in parts)
+
+
+def free_slots(venue_id: int, days: int = 7, start_date: date_cls | None = None) -> list[FreeSlot]:
+    """Free ranges within opening hours for ``days`` consecutive dates."""
+    start_date = start_date or timezone.localdate()
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+    indexes = get_day_indexes(venue_id, dates)
+    opening, closing = opening_minutes()
+
+    now = timezone.localtime()
+    slots: list[FreeSlot] = []
+    for day in dates:
+        cursor = opening
+        if day == now.date():
+            cursor = max(cursor, now.hour * 60 + now.minute)
+        for start, end in indexes[day]:
+            if start > cursor and cursor < closing:
+                slots.append(FreeSlot(day, to_time(cursor), to_time(min(start, closing))))
+            cursor = max(cursor, end)
+        if cursor < closing:
+            slots.append(FreeSlot(day, to_time(cursor), to_time(closing)))
+    return slots
+
+
+def invalidate(venue_id: int, day: date_cls, start_time: time, duration_hours: int) -> None:
+    parts = booking_intervals(day, start_time, duration_hours)
+    cache.delete_many([_cache_key(venue_id, part_day) for part_day, _ in parts])
+
@@ -0,0 +1,208 @@
+"""Helpers for driving the real WSGI application from benchmark commands."""
+from __future__ import annotations
+
+import io
+import itertools
+import math
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from typing import Callable
+from urllib.parse import urlencode, urlsplit
+
+FUNNEL_STEPS = (
+    "login",
+    "home",
+    "catalog",
+    "venue_detail",
+    "booking_form",
+    "booking_submit",
+    "booking_payment",
+    "payment_submit",
+    "booking_success",
+)
+
+
+@dataclass
+class WSGIResponse:
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+    def header(self, name: str) -> str | None:
+        name = name.lower()
+        return next((value for key, value in self.headers if key.lower() == name), None)
+
+
+class WSGIClient:
+    """A minimal cookie-keeping HTTP client that calls a WSGI callable in-process."""
+
+    def __init__(self, application: Callable, host: str = "localhost") -> None:
+        self.application = application
+        self.host = host
+        self.cookies: dict[str, str] = {}
+
+    def request(self, method: str, path: str, data: dict | None = None, headers: dict | None = None) -> WSGIResponse:
+        url = urlsplit(path)
+        body = urlencode(data or {}, doseq=True).encode() if method == "POST" else b""
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": url.path,
+            "QUERY_STRING": url.query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "HTTP_HOST": self.host,
+            "CONTENT_TYPE": "application/x-www-form-urlencoded",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        if self.cookies:
+            environ["HTTP_COOKIE"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        for name, value in (headers or {}).items():
+            environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+
+        captured: dict = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            captured["status"] = int(status.split(" ", 1)[0])
+            captured["headers"] = response_headers
+
+        result = self.application(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+
+        for key, value in captured["headers"]:
+            if key.lower() == "set-cookie":
+                for name, morsel in SimpleCookie(value).items():
+                    if morsel["max-age"] == "0" or morsel.value == "":
+                        self.cookies.pop(name, None)
+                    else:
+                        self.cookies[name] = morsel.value
+        return WSGIResponse(captured["status"], captured["headers"], content)
+
+    def get(self, path: str, **kwargs) -> WSGIResponse:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, data: dict, **kwargs) -> WSGIResponse:
+        data = {"csrfmiddlewaretoken": self.cookies.get("csrftoken", ""), **data}
+        return self.request("POST", path, data, **kwargs)
+
+
+@dataclass
+class StepStats:
+    samples: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.steps: dict[str, StepStats] = defaultdict(StepStats)
+        self.lock = threading.Lock()
+
+    def timed(self, step: str, call: Callable[[], WSGIResponse], expect: tuple[int, ...]) -> WSGIResponse:
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            stats = self.steps[step]
+            stats.samples.append(elapsed)
+            if response.status not in expect:
+                stats.errors += 1
+        return response
+
+    def merge(self, other: dict[str, StepStats]) -> None:
+        with self.lock:
+            for step, stats in other.items():
+                self.steps[step].samples.extend(stats.samples)
+                self.steps[step].errors += stats.errors
+
+    def report(self, wall_seconds: float, order: tuple[str, ...] = FUNNEL_STEPS) -> list[str]:
+        lines = [f"{'step':<18}{'count':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"]
+        names = [step for step in order if step in self.steps] + sorted(set(self.steps) - set(order))
+        for step in names:
+            stats = self.steps[step]
+            if not stats.samples:
+                continue
+            lines.append(
+                f"{step:<18}{len(stats.samples):>7}{stats.errors:>8}{len(stats.samples) / wall_seconds:>9.1f}"
+                f"{percentile(stats.samples, 0.50) * 1000:>9.1f}"
+                f"{percentile(stats.samples, 0.95) * 1000:>9.1f}"
+                f"{percentile(stats.samples, 0.99) * 1000:>9.1f}"
+            )
+        return lines
+
+
+BOOKING_ID_RE = re.compile(r"/booking/(\d+)/payment/")
+
+
+class SlotAllocator:
+    """Hands out distinct (date, hour) pairs so concurrent virtual users never collide."""
+
+    def __init__(self, start: date, first_hour: int = 6, last_hour: int = 22, offset: int = 0) -> None:
+        self.start = start
+        self.hours = last_hour - first_hour
+        self.first_hour = first_hour
+        self.counter = itertools.count(offset)
+        self.lock = threading.Lock()
+
+    def next(self) -> tuple[date, str]:
+        with self.lock:
+            number = next(self.counter)
+        day = self.start + timedelta(days=number // self.hours)
+        return day, f"{self.first_hour + number % self.hours:02d}:00"
+
+
+def run_funnel(client: WSGIClient, recorder: Recorder, username: str, password: str, venue_ids, slots, iterations, rng):
+    """Drive login → home → catalog → venue → booking → payment → success ``iterations`` times."""
+    client.get("/login/")
+    recorder.timed(
+        "login", lambda: client.post("/login/", {"username": username, "password": password}), expect=(302,)
+    )
+    for _ in range(iterations):
+        venue_id = rng.choice(venue_ids)
+        recorder.timed("home", lambda: client.get("/home/"), expect=(200,))
+        recorder.timed("catalog", lambda: client.get("/catalog/"), expect=(200,))
+        recorder.timed("venue_detail", lambda: client.get(f"/venue/{venue_id}/"), expect=(200,))
+        recorder.timed("booking_form", lambda: client.get(f"/venue/{venue_id}/book/"), expect=(200,))
+        day, start_time = slots.next()
+        response = recorder.timed(
+            "booking_submit",
+            lambda: client.post(
+                f"/venue/{venue_id}/book/",
+                {"date": day.isoformat(), "start_time": start_time, "duration_hours": 1, "notes": ""},
+            ),
+            expect=(302,),
+        )
+        match = BOOKING_ID_RE.search(response.header("Location") or "")
+        if not match:
+            continue
+        booking_id = match.group(1)
+        recorder.timed("booking_payment", lambda: client.get(f"/booking/{booking_id}/payment/"), expect=(200,))
+        recorder.timed(
+            "payment_submit",
+            lambda: client.post(f"/booking/{booking_id}/payment/", {"payment_method": "qris"}),
+            expect=(302,),
+        )
+        recorder.timed("booking_success", lambda: client.get(f"/booking/{booking_id}/success/"), expect=(200,))
@@ -0,0 +1,133 @@
+"""Change counters and ETags for conditional GETs on the venue pages.
+
+Signals bump a counter in the cache whenever data a page renders changes.
+A page's ETag digests the counters it depends on together with the per-user
+inputs (user, CSRF cookie, wishlist), so revalidating an unchanged page costs
+a couple of cache reads instead of the view's queries and render.
+
+The cache must be shared by every worker, or the others keep answering 304
+for a changed page; the production profile refuses a per-worker cache.
+
+Each bump also records when it happened. ``settled`` uses that to let a page
+render from a read replica only once its counters have been still for longer
+than replicas are allowed to lag, so the body matches the ETag it is sent
+with; see ``main.routers``.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+
+from django.contrib import messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+
+from . import routers, wishlists
+
+CACHE_PREFIX = "page-version"
+CHANGED_PREFIX = "page-changed"
+# Anything on a venue card or detail header, the facets and search results.
+VENUES = "venues"
+# Booking counts, which order the home page.
+POPULARITY = "popularity"
+
+
+def venue(venue_id: int) -> str:
+    """Per-venue data shown only on its detail page: add-ons and reviews."""
+    return f"venue:{venue_id}"
+
+
+def _cache_key(name: str) -> str:
+    return f"{CACHE_PREFIX}:{name}"
+
+
+def _changed_key(name: str) -> str:
+    return f"{CHANGED_PREFIX}:{name}"
+
+
+def _seed() -> int:
+    # Counters start from the clock rather than zero, so one that is evicted
+    # and recreated never repeats a value a client may still hold an ETag for.
+    return time.time_ns()
+
+
+def versions(*names: str) -> list[int]:
+    keys = [_cache_key(name) for name in names]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        for key in keys:
+            if key not in found:
+                cache.add(key, _seed(), None)
+        found = cache.get_many(keys)
+    return [found.get(key, 0) for key in keys]
+
+
+def bump(*names: str) -> None:
+    for name in names:
+        key = _cache_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed(), None)
+    changed_at = time.time()
+    cache.set_many({_changed_key(name): changed_at for name in names}, None)
+
+
+def settled(*names: str) -> bool:
+    """Whether none of ``names`` changed within ``REPLICA_STICKY_SECONDS``, the assumed replica lag."""
+    keys = [_changed_key(name) for name in names]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        # Evicted or never recorded: treat it as a change that just happened.
+        for key in keys:
+            if key not in found:
+                cache.add(key, time.time(), None)
+        found = cache.get_many(keys)
+    cutoff = time.time() - routers.sticky_seconds()
+    return all(found.get(key, cutoff + 1) <= cutoff for key in keys)
+
+
+def page_etag(request: HttpRequest, *names: str) -> str | None:
+    """ETag for a page built from ``names``; ``None`` disables the 304 shortcut."""
+    if len(messages.get_messages(request)):
+        # Pending flash messages render once and must not be skipped.
+        return None
+    # The pages embed CSRF tokens; get_token() fixes the secret (setting the
+    # cookie on this response if needed) so a rotated cookie changes the ETag.
+    get_token(request)
+    parts = [
+        request.get_full_path(),
+        # Pages link hashed asset names; a deploy with new assets re-renders them.
+        getattr(staticfiles_storage, "manifest_hash", ""),
+        request.user.pk,
+        request.META["CSRF_COOKIE"],
+        *versions(*names),
+        *sorted(wishlists.venue_ids(request)),
+    ]
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def home_etag(request: HttpRequest) -> str | None:
+    return page_etag(request, VENUES, POPULARITY)
+
+
+def catalog_etag(request: HttpRequest) -> str | None:
+    return page_etag(request, VENUES)
+
+
+def venue_detail_etag(request: HttpRequest, pk: int) -> str | None:
+    return page_etag(request, VENUES, venue(pk))
+
+
+def home_settled(request: HttpRequest) -> bool:
+    return settled(VENUES, POPULARITY)
+
+
+def catalog_settled(request: HttpRequest) -> bool:
+    return settled(VENUES)
+
+
+def venue_detail_settled(request: HttpRequest, pk: int) -> bool:
+    return settled(VENUES, venue(pk))
@@ -0,0 +1,39 @@
+"""Incremental maintenance of the denormalized counters stored on ``Venue``."""
+from __future__ import annotations
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from . import conditional
+from .models import Booking, Review, Venue, WishlistItem
+
+
+def adjust(venue_id: int, **deltas: int) -> None:
+    """Apply ``field=delta`` increments to one venue with a single UPDATE."""
+    Venue.objects.filter(pk=venue_id).update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def _aggregate(model, expression) -> Coalesce:
+    subquery = (
+        model.objects.filter(venue=OuterRef("pk"))
+        .order_by()
+        .values("venue")
+        .annotate(value=expression)
+        .values("value")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+
+def rebuild(queryset: QuerySet[Venue] | None = None) -> int:
+    """Recompute every counter from the source tables in one UPDATE statement."""
+    queryset = Venue.objects.all() if queryset is None else queryset
+    updated = queryset.update(
+        # Expired bookings were never paid for and do not make a venue popular.
+        booking_count=_aggregate(Booking, Count("pk", filter=Q(status__in=Booking.SLOT_HOLDING_STATUSES))),
+        review_count=_aggregate(Review, Count("pk")),
+        rating_sum=_aggregate(Review, Sum("rating")),
+        wishlist_count=_aggregate(WishlistItem, Count("pk")),
+        **{f"rating_{stars}": _aggregate(Review, Count("pk", filter=Q(rating=stars))) for stars in range(1, 6)},
+    )
+    conditional.bump(conditional.POPULARITY)
+    return updated
@@ -0,0 +1,151 @@
+"""Synthetic data for load tests and query-budget tests.
+
+Everything is written with ``bulk_create`` in batches, which bypasses the
+model signals; call ``refresh_derived_data`` afterwards so counters, facets
+and the search index match the new rows.
+"""
+from __future__ import annotations
+
+import itertools
+import random
+from collections import Counter
+from datetime import date, time, timedelta
+from decimal import Decimal
+from typing import Sequence
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Count
+
+from . import conditional, counters, facets, search
+from .models import AddOn, Booking, Category, Review, SlotClaim, Venue, WishlistItem
+from .reservations import claimed_slots
+
+CITIES = ["Jakarta", "Bandung", "Surabaya", "Yogyakarta", "Medan", "Semarang", "Makassar", "Denpasar"]
+CATEGORIES = ["Futsal", "Badminton", "Basketball", "Tennis", "Volleyball", "Mini Soccer"]
+WORDS = (
+    "premium indoor outdoor synthetic turf wooden floor lighting scoreboard locker shower parking cafe "
+    "air conditioned tribune sound system court hall arena field training tournament friendly"
+).split()
+BOOKING_HOURS = range(6, 22)
+BATCH_SIZE = 1000
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def create_users(count: int, prefix: str = "loaduser", password: str = "load-test-pass") -> list[User]:
+    # Hash once: per-user PBKDF2 would dominate the generation time.
+    hashed = make_password(password)
+    existing = User.objects.filter(username__startswith=prefix).count()
+    users = [User(username=f"{prefix}{existing + index}", password=hashed) for index in range(count)]
+    return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+
+def delete_users(users: Sequence[User]) -> None:
+    """Delete load-test users with their bookings, reviews and wishlists.
+
+    The cascade sends the model signals, so venue counters and caches follow.
+    """
+    User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+
+def create_venues(count: int, addons_per_venue: int = 2, seed: int = 0) -> list[Venue]:
+    rng = random.Random(seed)
+    categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+    offset = Venue.objects.count()
+    venues = []
+    for index in range(count):
+        category = rng.choice(categories)
+        venues.append(
+            Venue(
+                name=f"{rng.choice(WORDS).title()} {category.name} {offset + index:06d}",
+                city=rng.choice(CITIES),
+                category=category,
+                price_per_hour=Decimal(rng.randrange(50, 500) * 1000),
+                description=_sentence(rng, 18),
+                facilities=_sentence(rng, 6),
+                address=f"Jl. {rng.choice(WORDS).title()} No. {rng.randrange(1, 200)}",
+            )
+        )
+    venues = Venue.objects.bulk_create(venues, batch_size=BATCH_SIZE)
+    addons = [
+        AddOn(venue=venue, name=f"{rng.choice(WORDS).title()} package {number}", price=Decimal(rng.randrange(10, 200) * 1000))
+        for venue in venues
+        for number in range(addons_per_venue)
+    ]
+    AddOn.objects.bulk_create(addons, batch_size=BATCH_SIZE)
+    return venues
+
+
+def create_reviews(venues: Sequence[Venue], users: Sequence[User], count: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    pairs = zip(itertools.cycle(venues), itertools.cycle(users))
+    reviews = (
+        Review(venue=venue, user=user, rating=rng.randint(1, 5), comment=_sentence(rng, 12))
+        for venue, user in itertools.islice(pairs, count)
+    )
+    for batch in _batched(reviews):
+        Review.objects.bulk_create(batch)
+
+
+def create_bookings(
+    venues: Sequence[Venue], users: Sequence[User], count: int, start: date | None = None
+) -> list[Booking]:
+    """Non-overlapping one-hour bookings, with their slot claims, spread over ``venues``.
+
+    Each venue's bookings fill ``BOOKING_HOURS`` day by day from ``start``,
+    continuing after the bookings the venue already has.
+    """
+    start = start or date.today() + timedelta(days=1)
+    taken = Counter(
+        dict(
+            Booking.objects.filter(venue__in=venues)
+            .order_by()
+            .values("venue")
+            .annotate(total=Count("pk"))
+            .values_list("venue", "total")
+        )
+    )
+    created: list[Booking] = []
+    pairs = zip(itertools.cycle(venues), itertools.cycle(users))
+    for batch in _batched(itertools.islice(pairs, count)):
+        bookings = []
+        for venue, user in batch:
+            number = taken[venue.pk]
+            taken[venue.pk] += 1
+            day = start + timedelta(days=number // len(BOOKING_HOURS))
+            hour = BOOKING_HOURS[number % len(BOOKING_HOURS)]
+            booking = Booking(user=user, venue=venue, date=day, start_time=time(hour, 0), duration_hours=1)
+            booking.calculate_totals(addons=(), commit=False)
+            bookings.append(booking)
+        bookings = Booking.objects.bulk_create(bookings)
+        SlotClaim.objects.bulk_create(
+            SlotClaim(venue_id=booking.venue_id, booking=booking, date=slot_date, slot=slot)
+            for booking in bookings
+            for slot_date, slot in claimed_slots(booking.date, booking.start_time, booking.duration_hours)
+        )
+        created.extend(bookings)
+    return created
+
+
+def create_wishlist(users: Sequence[User], venues: Sequence[Venue]) -> None:
+    items = (WishlistItem(user=user, venue=venue) for user in users for venue in venues)
+    for batch in _batched(items):
+        WishlistItem.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def refresh_derived_data() -> None:
+    counters.rebuild()
+    facets.invalidate()
+    # Bump first: it keeps a current local index current, and this one is not.
+    search.bump_version()
+    search.reset_index()
+    conditional.bump(conditional.VENUES, conditional.POPULARITY)
+
+
+def _batched(iterable, size: int = BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
@@ -0,0 +1,104 @@
+"""Expiry of unpaid bookings and completion of past ones.
+
+Both passes walk the ``(status, ...)`` indexes in small batches, each in its
+own short transaction, so a large backlog never holds a long write lock. They
+use queryset ``update()``, which skips the model signals; the counters and
+caches those signals would maintain are updated here instead.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import availability, conditional, counters
+from .models import Booking, SlotClaim
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class ReapStats:
+    expired: int = 0
+    completed: int = 0
+
+
+def payment_ttl() -> timedelta:
+    return timedelta(minutes=getattr(settings, "BOOKING_PAYMENT_TTL_MINUTES", 30))
+
+
+def cutoff(now: datetime | None = None) -> datetime:
+    """Waiting bookings created before this moment are past their payment window."""
+    return (now or timezone.now()) - payment_ttl()
+
+
+def is_expired(booking: Booking, now: datetime | None = None) -> bool:
+    if booking.status == Booking.STATUS_EXPIRED:
+        return True
+    return booking.status == Booking.STATUS_WAITING and booking.created_at < cutoff(now)
+
+
+def expire_waiting(now: datetime | None = None, batch_size: int = BATCH_SIZE) -> int:
+    """Expire waiting bookings past the payment window and release their slots."""
+    deadline = cutoff(now)
+    expired = 0
+    while True:
+        with transaction.atomic():
+            # Locking the rows makes a concurrent payment wait and then find the
+            # booking expired; SQLite's IMMEDIATE transactions serialize them anyway.
+            rows = list(
+                Booking.objects.select_for_update(skip_locked=True)
+                .filter(status=Booking.STATUS_WAITING, created_at__lt=deadline)
+                .order_by("created_at", "pk")
+                .values_list("pk", "venue_id", "date", "start_time", "duration_hours")[:batch_size]
+            )
+            if not rows:
+                return expired
+            ids = [row[0] for row in rows]
+            expired += Booking.objects.filter(pk__in=ids, status=Booking.STATUS_WAITING).update(
+                status=Booking.STATUS_EXPIRED
+            )
+            SlotClaim.objects.filter(booking__in=ids).delete()
+            for venue_id, count in Counter(row[1] for row in rows).items():
+                counters.adjust(venue_id, booking_count=-count)
+            transaction.on_commit(lambda rows=rows: _invalidate(rows))
+
+
+def complete_past(now: datetime | None = None, batch_size: int = BATCH_SIZE) -> int:
+    """Mark confirmed bookings whose time has fully passed as completed."""
+    now = timezone.localtime(now or timezone.now()).replace(tzinfo=None)
+    completed = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            Booking.objects.filter(status=Booking.STATUS_CONFIRMED, date__lt=now.date(), pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", "date", "start_time", "duration_hours")[:batch_size]
+        )
+        if not rows:
+            return completed
+        last_pk = rows[-1][0]
+        # Late bookings from yesterday may still be running past midnight.
+        ids = [
+            pk
+            for pk, day, start_time, duration_hours in rows
+            if datetime.combine(day, start_time) + timedelta(hours=duration_hours) <= now
+        ]
+        completed += Booking.objects.filter(pk__in=ids, status=Booking.STATUS_CONFIRMED).update(
+            status=Booking.STATUS_COMPLETED
+        )
+
+
+def reap(now: datetime | None = None, batch_size: int = BATCH_SIZE) -> ReapStats:
+    return ReapStats(expired=expire_waiting(now, batch_size), completed=complete_past(now, batch_size))
+
+
+def _invalidate(rows) -> None:
+    for _, venue_id, day, start_time, duration_hours in rows:
+        availability.invalidate(venue_id, day, start_time, duration_hours)
+    # The home page orders venues by booking_count.
+    conditional.bump(conditional.POPULARITY)
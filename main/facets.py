@@ -0,0 +1,62 @@
+"""Cached city/category facets for the venue filter dropdowns."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min
+
+from .models import Venue
+
+CACHE_KEY = "venue-facets"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class Facet:
+    value: str
+    venue_count: int
+    price_min: Decimal
+    price_max: Decimal
+
+
+@dataclass(frozen=True)
+class VenueFacets:
+    cities: tuple[Facet, ...]
+    categories: tuple[Facet, ...]
+    price_min: Decimal | None
+    price_max: Decimal | None
+
+
+def _facet_values(field: str) -> tuple[Facet, ...]:
+    rows = (
+        Venue.objects.order_by()
+        .values(field)
+        .annotate(venue_count=Count("pk"), price_min=Min("price_per_hour"), price_max=Max("price_per_hour"))
+        .order_by(field)
+    )
+    return tuple(Facet(row[field], row["venue_count"], row["price_min"], row["price_max"]) for row in rows)
+
+
+def compute_facets() -> VenueFacets:
+    cities = _facet_values("city")
+    categories = _facet_values("category__name")
+    return VenueFacets(
+        cities=cities,
+        categories=categories,
+        price_min=min((facet.price_min for facet in cities), default=None),
+        price_max=max((facet.price_max for facet in cities), default=None),
+    )
+
+
+def get_facets() -> VenueFacets:
+    facets = cache.get(CACHE_KEY)
+    if facets is None:
+        facets = compute_facets()
+        cache.set(CACHE_KEY, facets, CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate() -> None:
+    cache.delete(CACHE_KEY)
@@ -1,13 +1,23 @@
+from datetime import timedelta
+
 from django import forms
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import availability, reservations
+from .models import AddOn, Booking, Review, SlotClaim
 
-from .models import AddOn, Booking, Review
+# How far ahead a slot can be booked or quoted; also keeps availability's
+# date arithmetic well inside ``date.max``.
+BOOKING_HORIZON_DAYS = 365
 
 
 class LoginForm(forms.Form):
-    username = forms.CharField(max_length=150, widget=forms.TextInput(attrs={"placeholder": "Username"}))
-    password = forms.CharField(widget=forms.PasswordInput(attrs={"placeholder": "Password"}))
+    username = forms.CharField(
+        max_length=150, widget=forms.TextInput(attrs={"placeholder": "Username", "class": "form-control"})
+    )
+    password = forms.CharField(widget=forms.PasswordInput(attrs={"placeholder": "Password", "class": "form-control"}))
 
     def clean(self):
         cleaned_data = super().clean()
@@ -22,9 +32,9 @@ class LoginForm(forms.Form):
 
 
 class RegisterForm(forms.Form):
-    username = forms.CharField(max_length=150)
-    password = forms.CharField(widget=forms.PasswordInput)
-    confirm_password = forms.CharField(widget=forms.PasswordInput)
+    username = forms.CharField(max_length=150, widget=forms.TextInput(attrs={"class": "form-control"}))
+    password = forms.CharField(widget=forms.PasswordInput(attrs={"class": "form-control"}))
+    confirm_password = forms.CharField(widget=forms.PasswordInput(attrs={"class": "form-control"}))
 
     def clean_username(self):
         username = self.cleaned_data["username"]
@@ -47,10 +57,27 @@ class RegisterForm(forms.Form):
         )
 
 
+def _check_booking_date(day, allow_past=False):
+    today = timezone.localdate()
+    if not allow_past and day < today:
+        raise forms.ValidationError("Pick a date from today onwards.")
+    if day > today + timedelta(days=BOOKING_HORIZON_DAYS):
+        raise forms.ValidationError(f"Bookings can be made at most {BOOKING_HORIZON_DAYS} days ahead.")
+    return day
+
+
+def _check_slot_boundary(start_time):
+    if start_time.minute % SlotClaim.SLOT_MINUTES or start_time.second:
+        raise forms.ValidationError(f"Start time must be on a {SlotClaim.SLOT_MINUTES}-minute boundary.")
+    return start_time
+
+
 class BookingForm(forms.ModelForm):
-    date = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
-    start_time = forms.TimeField(widget=forms.TimeInput(attrs={"type": "time"}))
-    duration_hours = forms.IntegerField(min_value=1, max_value=12)
+    date = forms.DateField(widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}))
+    start_time = forms.TimeField(widget=forms.TimeInput(attrs={"type": "time", "class": "form-control"}))
+    duration_hours = forms.IntegerField(
+        min_value=1, max_value=Booking.MAX_DURATION_HOURS, widget=forms.NumberInput(attrs={"class": "form-control"})
+    )
     addons = forms.ModelMultipleChoiceField(
         queryset=AddOn.objects.none(), required=False, widget=forms.CheckboxSelectMultiple
     )
@@ -58,15 +85,84 @@ class BookingForm(forms.ModelForm):
     class Meta:
         model = Booking
         fields = ["date", "start_time", "duration_hours", "addons", "notes"]
-        widgets = {"notes": forms.Textarea(attrs={"rows": 3, "placeholder": "Notes or requirements"})}
+        widgets = {
+            "notes": forms.Textarea(
+                attrs={"rows": 3, "placeholder": "Notes or requirements", "class": "form-control"}
+            )
+        }
 
     def __init__(self, *args, **kwargs):
-        venue = kwargs.pop("venue", None)
+        self.venue = kwargs.pop("venue", None)
         super().__init__(*args, **kwargs)
-        if venue is not None:
-            self.fields["addons"].queryset = venue.addons.all()
+        if self.venue is not None:
+            self.fields["addons"].queryset = self.venue.addons.all()
             self.fields["addons"].label_from_instance = lambda obj: f"{obj.name} - Rp{int(obj.price):,}"
 
+    def clean_date(self):
+        return _check_booking_date(self.cleaned_data["date"])
+
+    def clean_start_time(self):
+        return _check_slot_boundary(self.cleaned_data["start_time"])
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date = cleaned_data.get("date")
+        start_time = cleaned_data.get("start_time")
+        duration_hours = cleaned_data.get("duration_hours")
+        if self.venue is not None and date and start_time and duration_hours:
+            if not availability.is_slot_free(self.venue.pk, date, start_time, duration_hours):
+                raise forms.ValidationError("This time slot is already booked. Please pick another schedule.")
+        return cleaned_data
+
+
+class BookingAdminForm(forms.ModelForm):
+    """Rejects a slot another booking has claimed; ``BookingAdmin.save_model`` moves the claims."""
+
+    class Meta:
+        model = Booking
+        fields = "__all__"
+
+    def clean_date(self):
+        # Past bookings stay editable here.
+        return _check_booking_date(self.cleaned_data["date"], allow_past=True)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        venue = cleaned_data.get("venue")
+        date = cleaned_data.get("date")
+        start_time = cleaned_data.get("start_time")
+        duration_hours = cleaned_data.get("duration_hours")
+        status = cleaned_data.get("status")
+        if (
+            venue is not None
+            and date
+            and start_time
+            and duration_hours
+            and status in Booking.SLOT_HOLDING_STATUSES
+            and reservations.slot_taken(venue.pk, date, start_time, duration_hours, exclude=self.instance.pk)
+        ):
+            raise forms.ValidationError("Another booking already holds part of this time slot.")
+        return cleaned_data
+
+
+class QuoteForm(forms.Form):
+    """The booking form's schedule and add-ons, validated against cached add-on IDs instead of a queryset."""
+
+    date = forms.DateField()
+    start_time = forms.TimeField()
+    duration_hours = forms.IntegerField(min_value=1, max_value=Booking.MAX_DURATION_HOURS)
+    addons = forms.TypedMultipleChoiceField(coerce=int, required=False)
+
+    def __init__(self, *args, addon_ids=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["addons"].choices = [(addon_id, addon_id) for addon_id in addon_ids]
+
+    def clean_date(self):
+        return _check_booking_date(self.cleaned_data["date"])
+
+    def clean_start_time(self):
+        return _check_slot_boundary(self.cleaned_data["start_time"])
+
 
 class PaymentForm(forms.Form):
     payment_method = forms.ChoiceField(choices=Booking.PAYMENT_CHOICES, widget=forms.RadioSelect)
@@ -0,0 +1,45 @@
+"""Cached HTML fragments for venue cards.
+
+A card's cache key carries the venue id and ``updated_at``, so every save
+produces a fresh key and stale fragments are never read; they simply expire.
+Category and add-on changes touch ``updated_at`` on the affected venues (see
+``main.signals``). Anything per-user or per-request, such as the wishlist
+form and its CSRF token, stays outside the cached fragment.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Venue
+
+TEMPLATE = "main/includes/venue_card.html"
+CACHE_TIMEOUT = 60 * 60 * 24
+# Bump whenever TEMPLATE changes so old markup is not served after a deploy.
+VERSION = 1
+
+
+def cache_key(venue: Venue) -> str:
+    return f"venue-card:{VERSION}:{venue.pk}:{venue.updated_at.timestamp()}"
+
+
+def attach_cards(venues: Iterable[Venue]) -> list[Venue]:
+    """Set ``card_html`` on each venue, rendering only the cache misses.
+
+    The venues need ``category`` loaded (``select_related``) for the misses.
+    """
+    venues = list(venues)
+    by_key = {cache_key(venue): venue for venue in venues}
+    cached = cache.get_many(by_key)
+    rendered = {}
+    for key, venue in by_key.items():
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(TEMPLATE, {"venue": venue})
+        venue.card_html = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, CACHE_TIMEOUT)
+    return venues
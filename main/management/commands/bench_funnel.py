@@ -0,0 +1,118 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from main import datagen
+from main.benchmarking import Recorder, SlotAllocator, WSGIClient, run_funnel
+from main.models import Booking, Venue
+
+PASSWORD = "bench-funnel-pass"
+
+
+def _virtual_user(username, venue_ids, slots, iterations, host, seed):
+    from Ragaspace.wsgi import application
+
+    recorder = Recorder()
+    slots = SlotAllocator(*slots)
+    client = WSGIClient(application, host=host)
+    try:
+        run_funnel(client, recorder, username, PASSWORD, venue_ids, slots, iterations, random.Random(seed))
+    finally:
+        connections.close_all()
+    return dict(recorder.steps)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the login → home → catalog → venue → booking → payment → success funnel through "
+        "Ragaspace.wsgi.application with concurrent virtual users and report per-step latency. "
+        "The virtual users and their bookings are deleted afterwards unless --keep is given; "
+        "data generated with --venues, --reviews or --bookings is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users.")
+        parser.add_argument("--iterations", type=int, default=5, help="Funnel passes per virtual user.")
+        parser.add_argument("--processes", action="store_true", help="Run users in processes instead of threads.")
+        parser.add_argument("--host", default="localhost", help="Host header; must be in ALLOWED_HOSTS.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Keep the virtual users and their bookings.")
+        parser.add_argument("--venues", type=int, default=0, help="Generate this many synthetic venues first.")
+        parser.add_argument("--reviews", type=int, default=0, help="Generate this many synthetic reviews first.")
+        parser.add_argument("--bookings", type=int, default=0, help="Generate this many synthetic bookings first.")
+
+    def handle(self, *args, **options):
+        if options["venues"] or options["reviews"] or options["bookings"]:
+            self._generate(options)
+
+        # Sample by pk with the seeded generator: ORDER BY RANDOM() sorts the whole
+        # table and picks different venues on every run.
+        all_ids = list(Venue.objects.order_by("pk").values_list("pk", flat=True))
+        if not all_ids:
+            raise CommandError("No venues to book; pass --venues to generate some.")
+        venue_ids = sorted(random.Random(options["seed"]).sample(all_ids, min(len(all_ids), 1000)))
+
+        prefix = f"bench{int(time.time())}_"
+        users = datagen.create_users(options["users"], prefix=prefix, password=PASSWORD)
+        try:
+            recorder, wall = self._run(options, venue_ids, users)
+        finally:
+            if not options["keep"]:
+                datagen.delete_users(users)
+
+        for line in recorder.report(wall):
+            self.stdout.write(line)
+        funnels = len(recorder.steps["booking_success"].samples)
+        self.stdout.write(self.style.SUCCESS(f"{funnels} completed funnel(s) in {wall:.2f}s ({funnels / wall:.2f}/s)"))
+
+    def _run(self, options, venue_ids, users):
+        # Each virtual user books its own run of slots, starting after every slot earlier
+        # runs could have used, so bookings never collide even across processes.
+        start_day = timezone.localdate() + timedelta(days=30)
+        first_slot = Booking.objects.count()
+
+        self.stdout.write(
+            f"Running {len(users)} virtual user(s) x {options['iterations']} funnel(s) "
+            f"in {'processes' if options['processes'] else 'threads'} over {len(venue_ids)} venue(s)..."
+        )
+        recorder = Recorder()
+        connections.close_all()
+        start = time.perf_counter()
+        if options["processes"]:
+            executor = ProcessPoolExecutor(max_workers=len(users), mp_context=get_context("fork"))
+        else:
+            executor = ThreadPoolExecutor(max_workers=len(users))
+        with executor:
+            futures = [
+                executor.submit(
+                    _virtual_user,
+                    user.username,
+                    venue_ids,
+                    (start_day, 6, 22, first_slot + index * options["iterations"]),
+                    options["iterations"],
+                    options["host"],
+                    options["seed"] + index,
+                )
+                for index, user in enumerate(users)
+            ]
+            for future in futures:
+                recorder.merge(future.result())
+        return recorder, time.perf_counter() - start
+
+    def _generate(self, options):
+        start = time.perf_counter()
+        venues = datagen.create_venues(options["venues"], seed=options["seed"]) or list(Venue.objects.all()[:1000])
+        users = datagen.create_users(max(10, options["reviews"] // 50), prefix=f"gen{int(time.time())}_")
+        datagen.create_reviews(venues, users, options["reviews"], seed=options["seed"])
+        datagen.create_bookings(venues, users, options["bookings"], start=timezone.localdate() + timedelta(days=1))
+        datagen.refresh_derived_data()
+        self.stdout.write(
+            f"Generated {options['venues']} venue(s), {options['reviews']} review(s) and "
+            f"{options['bookings']} booking(s) in {time.perf_counter() - start:.1f}s"
+        )
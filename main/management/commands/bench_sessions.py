@@ -0,0 +1,124 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from main import datagen
+from main.benchmarking import FUNNEL_STEPS, Recorder, SlotAllocator, WSGIClient, run_funnel
+from main.models import Booking, Venue
+
+PASSWORD = "bench-sessions-pass"
+DB = "django.contrib.sessions.backends.db"
+CACHED_DB = "django.contrib.sessions.backends.cached_db"
+CACHE = "django.contrib.sessions.backends.cache"
+FALLBACK_MESSAGES = "django.contrib.messages.storage.fallback.FallbackStorage"
+SESSION_MESSAGES = "django.contrib.messages.storage.session.SessionStorage"
+COOKIE_MESSAGES = "django.contrib.messages.storage.cookie.CookieStorage"
+
+# name: (SESSION_ENGINE, MESSAGE_STORAGE)
+CONFIGURATIONS = {
+    "django-default": (DB, FALLBACK_MESSAGES),
+    "db+session-msg": (DB, SESSION_MESSAGES),
+    "cached_db+cookie": (CACHED_DB, COOKIE_MESSAGES),
+    "cache+cookie": (CACHE, COOKIE_MESSAGES),
+}
+
+
+class SessionQueryRecorder(Recorder):
+    """Times funnel steps and counts the django_session statements each one issues."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.step: str | None = None
+        self.reads: Counter = Counter()
+        self.writes: Counter = Counter()
+
+    def timed(self, step, call, expect):
+        self.step = step
+        try:
+            return super().timed(step, call, expect)
+        finally:
+            self.step = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.step is not None and "django_session" in sql:
+            counter = self.reads if sql.lstrip().upper().startswith("SELECT") else self.writes
+            counter[self.step] += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the booking funnel under several session engine / message storage combinations "
+        "and report django_session reads and writes per request for each step. "
+        "The users it creates are deleted afterwards unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5, help="Funnel passes per configuration.")
+        parser.add_argument(
+            "--config", action="append", choices=sorted(CONFIGURATIONS), help="Only these (repeatable)."
+        )
+        parser.add_argument("--host", default="localhost", help="Host header; must be in ALLOWED_HOSTS.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--keep", action="store_true", help="Keep the users and their bookings.")
+
+    def handle(self, *args, **options):
+        venue_ids = list(Venue.objects.order_by("pk").values_list("pk", flat=True)[:100])
+        if not venue_ids:
+            raise CommandError("No venues to book; generate some with bench_funnel --venues.")
+        names = options["config"] or list(CONFIGURATIONS)
+        # Book far ahead, after every slot an earlier run could have used.
+        slots = SlotAllocator(timezone.localdate() + timedelta(days=60), offset=Booking.objects.count())
+
+        results = {}
+        users = []
+        try:
+            for name in names:
+                users.extend(datagen.create_users(1, prefix=f"benchsessions{int(time.time())}_", password=PASSWORD))
+                results[name] = self._measure(name, users[-1], venue_ids, slots, options)
+        finally:
+            if not options["keep"]:
+                datagen.delete_users(users)
+
+        self.stdout.write("django_session writes (reads) per request")
+        self.stdout.write(f"{'step':<18}" + "".join(f"{name:>18}" for name in names))
+        totals = Counter()
+        for step in FUNNEL_STEPS:
+            cells = []
+            for name in names:
+                recorder = results[name]
+                requests = len(recorder.steps[step].samples) or 1
+                totals[name] += recorder.writes[step] / requests
+                cells.append(f"{recorder.writes[step] / requests:.2f} ({recorder.reads[step] / requests:.2f})")
+            self.stdout.write(f"{step:<18}" + "".join(f"{cell:>18}" for cell in cells))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "writes per funnel pass: " + ", ".join(f"{name} {totals[name]:.2f}" for name in names)
+            )
+        )
+
+    def _measure(self, name, user, venue_ids, slots, options):
+        engine, storage = CONFIGURATIONS[name]
+        recorder = SessionQueryRecorder()
+        with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage):
+            # SessionMiddleware binds its engine when the handler loads middleware.
+            client = WSGIClient(WSGIHandler(), host=options["host"])
+            with connection.execute_wrapper(recorder):
+                run_funnel(
+                    client,
+                    recorder,
+                    user.username,
+                    PASSWORD,
+                    venue_ids,
+                    slots,
+                    options["iterations"],
+                    random.Random(options["seed"]),
+                )
+        return recorder
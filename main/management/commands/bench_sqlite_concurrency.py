@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import override_settings
+
+from main import datagen
+from main.benchmarking import Recorder, StepStats, percentile
+from main.models import Venue, WishlistItem
+from main.sqlite import is_locked_error, pragmas, retry_on_locked
+
+
+def _read(venue_id):
+    list(Venue.objects.select_related("category").order_by("name", "id")[:12])
+    Venue.objects.get(pk=venue_id)
+    WishlistItem.objects.filter(venue_id=venue_id).count()
+
+
+def _write(user_id, venue_ids):
+    # A short write transaction, like a few wishlist toggles with their counter updates.
+    with transaction.atomic():
+        for venue_id in venue_ids[:5]:
+            item, created = WishlistItem.objects.get_or_create(user_id=user_id, venue_id=venue_id)
+            if not created:
+                item.delete()
+
+
+def _worker(role, index, user_id, venue_ids, measure_from, deadline, no_retry):
+    """Run reads or writes until ``deadline``, recording those that start after ``measure_from``."""
+    write = _write if no_retry else retry_on_locked(_write)
+    stats = StepStats()
+    count = 0
+    try:
+        while (now := time.time()) < deadline:
+            start = time.perf_counter()
+            try:
+                if role == "read":
+                    _read(venue_ids[(index + count) % len(venue_ids)])
+                else:
+                    write(user_id, venue_ids[index * 5 % len(venue_ids):])
+            except OperationalError as exc:
+                if not is_locked_error(exc):
+                    raise
+                stats.errors += 1
+            count += 1
+            if now >= measure_from:
+                stats.samples.append(time.perf_counter() - start)
+    finally:
+        connections.close_all()
+    return {role: stats}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure read throughput on the SQLite database while writer processes commit, "
+        "to compare journal modes and PRAGMAs. Writes wishlist rows for throwaway users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument(
+            "--journal-mode", choices=["wal", "delete"], help="Override SQLITE_PRAGMAS journal_mode for this run."
+        )
+        parser.add_argument("--synchronous", choices=["off", "normal", "full"])
+        parser.add_argument("--no-retry", action="store_true", help="Count locked writes as errors instead.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark only applies to SQLite.")
+        venue_ids = list(Venue.objects.order_by("pk").values_list("pk", flat=True)[:200])
+        if not venue_ids:
+            raise CommandError("No venues to read; generate some with bench_funnel --venues.")
+
+        overrides = {
+            name: options[option]
+            for name, option in (("journal_mode", "journal_mode"), ("synchronous", "synchronous"))
+            if options[option]
+        }
+        with override_settings(SQLITE_PRAGMAS={**pragmas(), **overrides}):
+            # journal_mode is stored in the file; switch it while no other connection is open.
+            connections.close_all()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+            users = datagen.create_users(options["writers"], prefix=f"benchsqlite{int(time.time())}_")
+            try:
+                recorder, wall = self._run(options, venue_ids, users)
+            finally:
+                WishlistItem.objects.filter(user__in=users).delete()
+                for user in users:
+                    user.delete()
+
+        self.stdout.write(f"journal_mode={mode}, {options['readers']} reader(s), {options['writers']} writer(s)")
+        for line in recorder.report(wall, order=("read", "write")):
+            self.stdout.write(line)
+        reads = recorder.steps["read"]
+        # No reads finish with --readers 0 or a window shorter than one read.
+        read_p99 = f"{percentile(reads.samples, 0.99) * 1000:.1f} ms" if reads.samples else "n/a"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(reads.samples) / wall:.0f} reads/s, read p99 {read_p99} "
+                f"while writing {len(recorder.steps['write'].samples) / wall:.0f} txn/s"
+            )
+        )
+
+    def _run(self, options, venue_ids, users):
+        recorder = Recorder()
+        connections.close_all()
+        # One second of warm-up lets every worker connect before timing starts.
+        measure_from = time.time() + 1
+        deadline = measure_from + options["seconds"]
+        jobs = [("read", index, None) for index in range(options["readers"])]
+        jobs += [("write", index, user.pk) for index, user in enumerate(users)]
+        # Processes, like gunicorn workers: threads would mostly measure the GIL.
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=get_context("fork")) as executor:
+            futures = [
+                executor.submit(
+                    _worker, role, index, user_id, venue_ids, measure_from, deadline, options["no_retry"]
+                )
+                for role, index, user_id in jobs
+            ]
+            for future in futures:
+                recorder.merge(future.result())
+        return recorder, options["seconds"]
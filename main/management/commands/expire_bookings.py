@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main import expiry
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire waiting bookings older than BOOKING_PAYMENT_TTL_MINUTES, releasing their slots, "
+        "and mark confirmed bookings that have ended as completed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=expiry.BATCH_SIZE)
+        parser.add_argument(
+            "--loop", type=float, metavar="SECONDS", help="Keep running, sleeping this long between passes."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            stats = expiry.reap(batch_size=options["batch_size"])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Expired {stats.expired} and completed {stats.completed} booking(s) in {elapsed:.2f}s."
+                )
+            )
+            if options["loop"] is None:
+                return
+            try:
+                time.sleep(options["loop"])
+            except KeyboardInterrupt:
+                return
+            # A long-lived loop must not keep a connection the server already dropped.
+            close_old_connections()
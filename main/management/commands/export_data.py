@@ -0,0 +1,42 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from main import transfer
+
+
+class Command(BaseCommand):
+    help = "Stream venues, add-ons or bookings to a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(transfer.EXPORTS))
+        parser.add_argument("path", help="File to write, or - for stdout.")
+        parser.add_argument("--format", choices=transfer.FORMATS, help="Defaults to jsonl for .jsonl/.ndjson, else csv.")
+        parser.add_argument("--batch-size", type=int, default=transfer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        kind = options["kind"]
+        fmt = transfer.detect_format(path, options["format"])
+        fields = transfer.EXPORTS[kind][0]
+        rows = 0
+
+        def counted():
+            nonlocal rows
+            for row in transfer.export_rows(kind, chunk_size=options["batch_size"]):
+                rows += 1
+                yield row
+
+        start = time.perf_counter()
+        handle = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+        try:
+            handle.writelines(transfer.iter_lines(counted(), fields, fmt))
+        finally:
+            if handle is not sys.stdout:
+                handle.close()
+        elapsed = time.perf_counter() - start
+        # Report on stderr so "-" output stays clean.
+        self.stderr.write(
+            self.style.SUCCESS(f"{kind}: {rows} row(s) in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+        )
@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main import datagen, transfer
+
+
+class Command(BaseCommand):
+    help = "Upsert venues, add-ons or bookings from a CSV or JSON Lines file, streaming it in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(transfer.IMPORTS))
+        parser.add_argument("path", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=transfer.FORMATS, help="Defaults to jsonl for .jsonl/.ndjson, else csv.")
+        parser.add_argument("--batch-size", type=int, default=transfer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = transfer.detect_format(path, options["format"])
+        start = time.perf_counter()
+        handle = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            stats = transfer.IMPORTS[options["kind"]](transfer.read_rows(handle, fmt), options["batch_size"])
+        except ValueError as exc:
+            raise CommandError(f"{path}: {exc}; the batches before it were imported.") from exc
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            datagen.refresh_derived_data()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['kind']}: {stats.rows} row(s) in {elapsed:.1f}s ({stats.rows / elapsed:.0f} rows/s) - "
+                f"{stats.created} created, {stats.updated} updated, {stats.unchanged} unchanged, {stats.skipped} skipped"
+            )
+        )
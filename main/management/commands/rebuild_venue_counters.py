@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from main import counters
+from main.models import Venue
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized booking/review/wishlist counters stored on each venue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("venue_ids", nargs="*", type=int, help="Only rebuild these venues.")
+
+    def handle(self, *args, **options):
+        queryset = Venue.objects.all()
+        if options["venue_ids"]:
+            queryset = queryset.filter(pk__in=options["venue_ids"])
+        updated = counters.rebuild(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} venue(s)."))
@@ -0,0 +1,113 @@
+"""In-process request metrics: per-view histograms and N+1 detection.
+
+Everything here is process-local and lock-protected; each worker exposes its
+own numbers on ``/metrics/`` in the Prometheus text format.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.samples += 1
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+    template_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+
+HISTOGRAMS = {
+    "ragaspace_request_queries": ("SQL queries per request.", QUERY_BUCKETS),
+    "ragaspace_request_db_seconds": ("Time spent in SQL per request.", SECONDS_BUCKETS),
+    "ragaspace_template_render_seconds": ("Template rendering time per request.", SECONDS_BUCKETS),
+    "ragaspace_request_seconds": ("Total request latency.", SECONDS_BUCKETS),
+}
+N_PLUS_ONE_METRIC = "ragaspace_n_plus_one_total"
+
+current_request: ContextVar[RequestStats | None] = ContextVar("ragaspace_request_stats", default=None)
+
+_lock = threading.Lock()
+_histograms: dict[tuple[str, str], Histogram] = {}
+_n_plus_one: Counter = Counter()
+
+
+def record_template(seconds: float) -> None:
+    stats = current_request.get()
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+def repeated_shapes(stats: RequestStats, threshold: int) -> list[tuple[str, int]]:
+    return [(sql, count) for sql, count in stats.shapes.items() if count >= threshold]
+
+
+def observe_request(view: str, stats: RequestStats, total_seconds: float, n_plus_one: int) -> None:
+    values = {
+        "ragaspace_request_queries": stats.queries,
+        "ragaspace_request_db_seconds": stats.db_seconds,
+        "ragaspace_template_render_seconds": stats.template_seconds,
+        "ragaspace_request_seconds": total_seconds,
+    }
+    with _lock:
+        for name, value in values.items():
+            histogram = _histograms.get((name, view))
+            if histogram is None:
+                histogram = _histograms[(name, view)] = Histogram(HISTOGRAMS[name][1])
+            histogram.observe(value)
+        if n_plus_one:
+            _n_plus_one[view] += n_plus_one
+
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _n_plus_one.clear()
+
+
+def _label(view: str) -> str:
+    return view.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    lines: list[str] = []
+    with _lock:
+        for name, (help_text, _) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (metric, view), histogram in sorted(_histograms.items()):
+                if metric != name:
+                    continue
+                label = _label(view)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{view="{label}",le="+Inf"}} {histogram.samples}')
+                lines.append(f'{name}_sum{{view="{label}"}} {histogram.total}')
+                lines.append(f'{name}_count{{view="{label}"}} {histogram.samples}')
+        lines += [
+            f"# HELP {N_PLUS_ONE_METRIC} Requests that repeated one SQL statement shape past the threshold.",
+            f"# TYPE {N_PLUS_ONE_METRIC} counter",
+        ]
+        for view, count in sorted(_n_plus_one.items()):
+            lines.append(f'{N_PLUS_ONE_METRIC}{{view="{_label(view)}"}} {count}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, routers
+
+logger = logging.getLogger(__name__)
+
+
+class QueryMetricsMiddleware:
+    """Record query count, DB time, template time and latency per URL name.
+
+    Opt-in through ``METRICS_ENABLED``; when it is off Django drops the
+    middleware at startup and requests pay nothing.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.n_plus_one_threshold = getattr(settings, "METRICS_N_PLUS_ONE_THRESHOLD", 5)
+
+    def _execute(self, execute, sql, params, many, context):
+        stats = metrics.current_request.get()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if stats is not None:
+                stats.queries += 1
+                stats.db_seconds += time.perf_counter() - start
+                stats.shapes[sql] += 1
+
+    def __call__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(self._execute))
+                response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+
+        match = request.resolver_match
+        view = (match.view_name if match else None) or "<unresolved>"
+        repeated = metrics.repeated_shapes(stats, self.n_plus_one_threshold)
+        for sql, count in repeated:
+            logger.warning("Possible N+1 in %s: %d x %s", view, count, sql)
+        metrics.observe_request(view, stats, time.perf_counter() - start, len(repeated))
+        return response
+
+
+class ReplicaStickinessMiddleware:
+    """Pin a client to the primary database for a few seconds after it writes.
+
+    Any unsafe request (POST, PUT, ...) counts as a write. The deadline rides
+    in a cookie rather than the session, so pinning costs no session write.
+    Dropped at startup when no ``DATABASE_REPLICAS`` are configured.
+    """
+
+    def __init__(self, get_response):
+        if not routers.replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(routers.STICKY_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        request.read_from_primary = pinned_until > time.time()
+        response = self.get_response(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            seconds = routers.sticky_seconds()
+            response.set_cookie(
+                routers.STICKY_COOKIE, f"{time.time() + seconds:.3f}", max_age=seconds, httponly=True, samesite="Lax"
+            )
+        return response
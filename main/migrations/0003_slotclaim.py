@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:41
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def backfill_slot_claims(apps, schema_editor):
+    Booking = apps.get_model('main', 'Booking')
+    SlotClaim = apps.get_model('main', 'SlotClaim')
+
+    claims = []
+    for booking in Booking.objects.only('id', 'venue_id', 'date', 'start_time', 'duration_hours').iterator():
+        start_minute = booking.start_time.hour * 60 + booking.start_time.minute
+        first = start_minute // SLOT_MINUTES
+        last = -(-(start_minute + booking.duration_hours * 60) // SLOT_MINUTES)
+        for index in range(first, last):
+            claims.append(
+                SlotClaim(
+                    venue_id=booking.venue_id,
+                    booking_id=booking.id,
+                    date=booking.date + datetime.timedelta(days=index // SLOTS_PER_DAY),
+                    slot=index % SLOTS_PER_DAY,
+                )
+            )
+    # Rows that already overlap each other keep whichever claim lands first.
+    SlotClaim.objects.bulk_create(claims, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_seed_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_claims', to='main.booking')),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_claims', to='main.venue')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('venue', 'date', 'slot'), name='unique_venue_slot_claim')],
+            },
+        ),
+        migrations.RunPython(backfill_slot_claims, reverse_code=migrations.RunPython.noop),
+    ]
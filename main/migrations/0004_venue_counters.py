@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:43
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Venue = apps.get_model('main', 'Venue')
+
+    def aggregate(model_name, expression):
+        model = apps.get_model('main', model_name)
+        subquery = (
+            model.objects.filter(venue=OuterRef('pk')).order_by().values('venue').annotate(value=expression).values('value')
+        )
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+    Venue.objects.update(
+        booking_count=aggregate('Booking', Count('pk')),
+        review_count=aggregate('Review', Count('pk')),
+        rating_sum=aggregate('Review', Sum('rating')),
+        wishlist_count=aggregate('WishlistItem', Count('pk')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_slotclaim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venue',
+            name='booking_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['-booking_count', 'name'], name='venue_popularity_idx'),
+        ),
+        migrations.RunPython(populate_counters, reverse_code=migrations.RunPython.noop),
+    ]
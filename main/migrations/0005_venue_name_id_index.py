@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_venue_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['name', 'id'], name='venue_name_id_idx'),
+        ),
+    ]
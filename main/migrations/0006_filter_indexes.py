@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:46
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_venue_name_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['venue', 'date', 'start_time'], name='booking_venue_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', '-created_at'], name='booking_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='category_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['venue', '-created_at'], name='review_venue_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(django.db.models.functions.text.Lower('city'), name='venue_city_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['price_per_hour'], name='venue_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlistitem',
+            index=models.Index(fields=['user', '-created_at'], name='wishlist_user_recent_idx'),
+        ),
+    ]
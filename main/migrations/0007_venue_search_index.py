@@ -0,0 +1,36 @@
+from django.db import migrations
+
+INDEX_NAME = 'venue_search_gin'
+
+
+def _search_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    vector = SearchVector('name', weight='A', config='simple') + SearchVector(
+        'description', 'facilities', 'address', weight='B', config='simple'
+    )
+    return GinIndex(vector, name=INDEX_NAME)
+
+
+def create_search_index(apps, schema_editor):
+    # Other backends search through the in-process index in main.search.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('main', 'Venue'), _search_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('main', 'Venue'), _search_index())
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('main', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, reverse_code=drop_search_index),
+    ]
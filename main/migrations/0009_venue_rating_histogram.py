@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_histogram(apps, schema_editor):
+    Venue = apps.get_model('main', 'Venue')
+    Review = apps.get_model('main', 'Review')
+
+    def stars(value):
+        subquery = (
+            Review.objects.filter(venue=OuterRef('pk'))
+            .order_by()
+            .values('venue')
+            .annotate(value=Count('pk', filter=Q(rating=value)))
+            .values('value')
+        )
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), 0)
+
+    Venue.objects.update(**{f'rating_{value}': stars(value) for value in range(1, 6)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_venue_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='review',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_venue_recent_idx',
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['venue', '-created_at', '-id'], name='review_venue_recent_idx'),
+        ),
+        migrations.RunPython(populate_histogram, reverse_code=migrations.RunPython.noop),
+    ]
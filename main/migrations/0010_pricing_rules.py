@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:13
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_venue_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='deposit_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.CreateModel(
+            name='AddOnBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('addons', models.ManyToManyField(related_name='bundles', to='main.addon')),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='addon_bundles', to='main.venue')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RateRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120)),
+                ('days', models.CharField(choices=[('any', 'Every day'), ('weekday', 'Monday to Friday'), ('weekend', 'Saturday and Sunday')], default='any', max_length=10)),
+                ('start_hour', models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(23)])),
+                ('end_hour', models.PositiveSmallIntegerField(default=24, validators=[django.core.validators.MaxValueValidator(24)])),
+                ('multiplier', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rate_rules', to='main.category')),
+                ('venue', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rate_rules', to='main.venue')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:09
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_booking_expiry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='duration_hours',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)]),
+        ),
+    ]
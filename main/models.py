@@ -1,14 +1,21 @@
 from decimal import Decimal
+from typing import Iterable
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    # Blank means Booking.DEPOSIT_AMOUNT.
+    deposit_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [models.Index(Lower("name"), name="category_name_lower_idx")]
 
     def __str__(self) -> str:  # pragma: no cover - human readable representation
         return self.name
@@ -23,9 +30,28 @@ class Venue(models.Model):
     facilities = models.TextField(blank=True)
     image_url = models.URLField(blank=True)
     address = models.CharField(max_length=255, blank=True)
+    # Touched by main.signals when the venue's category or add-ons change; keys the card fragment cache.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized aggregates, maintained by main.counters.
+    booking_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    wishlist_count = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["-booking_count", "name"], name="venue_popularity_idx"),
+            models.Index(fields=["name", "id"], name="venue_name_id_idx"),
+            models.Index(Lower("city"), name="venue_city_lower_idx"),
+            models.Index(fields=["price_per_hour"], name="venue_price_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover - human readable representation
         return self.name
@@ -34,6 +60,17 @@ class Venue(models.Model):
     def starting_price(self) -> Decimal:
         return self.price_per_hour
 
+    @property
+    def rating_avg(self) -> float | None:
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 1)
+
+    @property
+    def rating_histogram(self) -> list[tuple[int, int]]:
+        """``(stars, review count)`` pairs from five stars down to one."""
+        return [(stars, getattr(self, f"rating_{stars}")) for stars in range(5, 0, -1)]
+
 
 class AddOn(models.Model):
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name="addons")
@@ -47,6 +84,59 @@ class AddOn(models.Model):
         return f"{self.name} ({self.venue.name})"
 
 
+class AddOnBundle(models.Model):
+    """A set of a venue's add-ons sold together for ``price`` when all of them are picked."""
+
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name="addon_bundles")
+    name = models.CharField(max_length=120)
+    addons = models.ManyToManyField(AddOn, related_name="bundles")
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.name} ({self.venue.name})"
+
+
+class RateRule(models.Model):
+    """Multiplies a venue's hourly price during ``[start_hour, end_hour)`` on matching days.
+
+    A rule may be scoped to one venue, one category, or neither (every venue).
+    Where several rules cover the same half hour, the most specific one wins;
+    see ``main.pricing``.
+    """
+
+    DAYS_ANY = "any"
+    DAYS_WEEKDAY = "weekday"
+    DAYS_WEEKEND = "weekend"
+    DAYS_CHOICES = [
+        (DAYS_ANY, "Every day"),
+        (DAYS_WEEKDAY, "Monday to Friday"),
+        (DAYS_WEEKEND, "Saturday and Sunday"),
+    ]
+
+    name = models.CharField(max_length=120)
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, null=True, blank=True, related_name="rate_rules")
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, null=True, blank=True, related_name="rate_rules"
+    )
+    days = models.CharField(max_length=10, choices=DAYS_CHOICES, default=DAYS_ANY)
+    start_hour = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(23)])
+    end_hour = models.PositiveSmallIntegerField(default=24, validators=[MaxValueValidator(24)])
+    multiplier = models.DecimalField(max_digits=5, decimal_places=2)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.name
+
+    def clean(self) -> None:
+        if self.start_hour is not None and self.end_hour is not None and self.start_hour >= self.end_hour:
+            raise ValidationError({"end_hour": "End hour must be after start hour."})
+
+
 class WishlistItem(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="wishlist_items")
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name="wishlisted_by")
@@ -55,6 +145,7 @@ class WishlistItem(models.Model):
     class Meta:
         unique_together = ("user", "venue")
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "-created_at"], name="wishlist_user_recent_idx")]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.user} → {self.venue}"
@@ -70,7 +161,8 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [models.Index(fields=["venue", "-created_at", "-id"], name="review_venue_recent_idx")]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Review by {self.user} for {self.venue}"
@@ -80,12 +172,17 @@ class Booking(models.Model):
     STATUS_WAITING = "waiting"
     STATUS_CONFIRMED = "confirmed"
     STATUS_COMPLETED = "completed"
+    STATUS_EXPIRED = "expired"
 
     STATUS_CHOICES = [
         (STATUS_WAITING, "Waiting for confirmation"),
         (STATUS_CONFIRMED, "Confirmed"),
         (STATUS_COMPLETED, "Completed"),
+        (STATUS_EXPIRED, "Expired"),
     ]
+    SLOT_HOLDING_STATUSES = [STATUS_WAITING, STATUS_CONFIRMED, STATUS_COMPLETED]
+    # What decides which slot a booking holds; see ``loaded_slot``.
+    SLOT_FIELDS = ("venue_id", "date", "start_time", "duration_hours", "status")
 
     PAYMENT_QRIS = "qris"
     PAYMENT_GOPAY = "gopay"
@@ -95,12 +192,16 @@ class Booking(models.Model):
     ]
 
     DEPOSIT_AMOUNT = Decimal("10000.00")
+    # Bounds how far a booking can spill into later days; see ``availability``.
+    MAX_DURATION_HOURS = 12
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="bookings")
     venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name="bookings")
     date = models.DateField()
     start_time = models.TimeField()
-    duration_hours = models.PositiveIntegerField(default=1)
+    duration_hours = models.PositiveIntegerField(
+        default=1, validators=[MinValueValidator(1), MaxValueValidator(MAX_DURATION_HOURS)]
+    )
     addons = models.ManyToManyField(AddOn, blank=True, related_name="bookings")
     notes = models.TextField(blank=True)
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
@@ -112,16 +213,72 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["venue", "date", "start_time"], name="booking_venue_slot_idx"),
+            models.Index(fields=["user", "-created_at"], name="booking_user_recent_idx"),
+            # Scanned by main.expiry: unpaid bookings by age, confirmed ones by date.
+            models.Index(fields=["status", "created_at"], name="booking_status_created_idx"),
+            models.Index(fields=["status", "date"], name="booking_status_date_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"Booking #{self.pk} - {self.venue.name}"
 
-    def calculate_totals(self) -> None:
-        addon_total = sum(addon.price for addon in self.addons.all())
-        venue_total = self.venue.price_per_hour * Decimal(self.duration_hours)
-        self.subtotal = venue_total + addon_total
-        self.deposit_amount = self.DEPOSIT_AMOUNT
-        self.grand_total = self.subtotal + self.deposit_amount
-        self.save(update_fields=["subtotal", "deposit_amount", "grand_total"])
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_slot = instance._slot_state()
+        return instance
+
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        self._loaded_slot = self._slot_state()
+
+    def _slot_state(self) -> tuple:
+        # Read __dict__ so deferred fields are not fetched just to be remembered.
+        return tuple(self.__dict__.get(name) for name in self.SLOT_FIELDS)
+
+    @property
+    def loaded_slot(self) -> dict | None:
+        """``SLOT_FIELDS`` as last loaded or saved, before any unsaved edits; ``None`` when unknown."""
+        state = getattr(self, "_loaded_slot", None)
+        if state is None or None in state:
+            return None
+        return dict(zip(self.SLOT_FIELDS, state))
+
+    def calculate_totals(self, addons: Iterable[AddOn] | None = None, commit: bool = True) -> None:
+        from .pricing import quote
+
+        if addons is None:
+            addons = self.addons.all()
+        totals = quote(self.venue, self.date, self.start_time, self.duration_hours, addons)
+        self.subtotal = totals.subtotal
+        self.deposit_amount = totals.deposit
+        self.grand_total = totals.grand_total
+        if commit:
+            self.save(update_fields=["subtotal", "deposit_amount", "grand_total"])
+
+
+class SlotClaim(models.Model):
+    """One reserved ``SLOT_MINUTES`` block of a venue's day, owned by a booking.
+
+    The unique constraint is what actually serializes competing bookings: two
+    transactions claiming an overlapping block cannot both commit.
+    """
+
+    SLOT_MINUTES = 30
+
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name="slot_claims")
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="slot_claims")
+    date = models.DateField()
+    slot = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["venue", "date", "slot"], name="unique_venue_slot_claim"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.venue_id} {self.date} slot {self.slot}"
 
 # Create your models here.
@@ -0,0 +1,131 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is the opaque, URL-safe encoding of the ordering key of the last row
+on a page. The next page filters strictly after that key, so it neither
+skips nor repeats rows when new rows are inserted between requests and never
+degrades into a large OFFSET scan.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+
+
+@dataclass(frozen=True)
+class KeysetPage:
+    items: list
+    next_cursor: str | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which DjangoJSONEncoder rounds to milliseconds."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str | None, length: int) -> list | None:
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def _after(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """``(a, b, c) > (x, y, z)`` spelled out for the ORM, honouring ``-`` prefixes."""
+    condition = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{name}__{lookup}": values[position]})
+        for previous, previous_field in enumerate(ordering[:position]):
+            clause &= Q(**{previous_field.lstrip("-"): values[previous]})
+        condition |= clause
+    return condition
+
+
+def keyset_paginate(queryset: QuerySet, cursor: str | None, *, ordering: Sequence[str], size: int) -> KeysetPage:
+    """Return one page of ``queryset`` ordered by ``ordering`` starting after ``cursor``.
+
+    ``ordering`` must end in a unique column (usually ``id``) so the key is total.
+    Invalid cursors fall back to the first page.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, len(ordering))
+    if values is not None:
+        try:
+            queryset = queryset.filter(_after(ordering, values))
+        except (TypeError, ValueError, ValidationError):
+            pass
+
+    items = list(queryset[: size + 1])
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip("-")) for field in ordering])
+    return KeysetPage(items=items, next_cursor=next_cursor)
+
+
+def ranked_paginate(
+    queryset: QuerySet,
+    search: Callable[[int], Sequence[int]],
+    cursor: str | None,
+    *,
+    size: int,
+    batch: int = 500,
+) -> KeysetPage:
+    """Page through ``queryset`` restricted to the ids ``search`` ranks, keeping their order.
+
+    Used for relevance-ordered search results, where there is no column to key
+    on; the cursor is the offset into the ranked list instead. ``search(limit)``
+    returns the best ``limit`` ids. Filters on ``queryset`` can reject most of
+    them, so the limit doubles until the page is full or the matches run out;
+    each new stretch of ids is checked ``batch`` at a time.
+    """
+    values = decode_cursor(cursor, 1)
+    offset = values[0] if values and isinstance(values[0], int) and values[0] > 0 else 0
+
+    ordered: list[int] = []
+    checked = 0
+    limit = max(batch, offset + size + 1)
+    while True:
+        ranked_ids = search(limit)
+        for start in range(checked, len(ranked_ids), batch):
+            chunk = ranked_ids[start : start + batch]
+            matching = set(queryset.filter(pk__in=chunk).values_list("pk", flat=True))
+            ordered.extend(pk for pk in chunk if pk in matching)
+        checked = len(ranked_ids)
+        if len(ordered) > offset + size or len(ranked_ids) < limit:
+            break
+        limit *= 2
+
+    page_ids = ordered[offset : offset + size]
+    objects = queryset.in_bulk(page_ids)
+    items = [objects[pk] for pk in page_ids if pk in objects]
+    next_cursor = encode_cursor([offset + size]) if len(ordered) > offset + size else None
+    return KeysetPage(items=items, next_cursor=next_cursor)
@@ -0,0 +1,306 @@
+"""Booking price quotes.
+
+A quote is computed in one pass from objects the caller already has (the
+venue and the picked add-ons) plus a process-local table of rate rules,
+category deposits and add-on bundles. The table is rebuilt when another
+process reports a change through the shared cache version key, and at least
+every ``TABLE_TTL`` seconds in case that report was lost, so quoting issues no
+queries in the steady state.
+
+The venue's hourly price is charged per ``SlotClaim.SLOT_MINUTES`` block, each
+block multiplied by the most specific ``RateRule`` covering it: venue rules
+beat category rules, which beat global ones; a weekday or weekend rule beats
+an every-day rule; remaining ties go to the oldest rule.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date as date_cls, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from time import monotonic
+from typing import Iterable, Sequence
+
+from django.core.cache import cache
+
+from .availability import MINUTES_PER_DAY, opening_minutes, to_time
+from .models import AddOn, AddOnBundle, Booking, Category, RateRule, SlotClaim, Venue
+
+VERSION_CACHE_KEY = "pricing-version"
+TABLE_TTL = 60
+PRICES_CACHE_PREFIX = "venue-prices"
+PRICES_CACHE_TIMEOUT = 60 * 60
+CENT = Decimal("0.01")
+BLOCK_MINUTES = SlotClaim.SLOT_MINUTES
+BLOCKS_PER_HOUR = 60 // BLOCK_MINUTES
+
+
+@dataclass(frozen=True)
+class Rule:
+    venue_id: int | None
+    category_id: int | None
+    days: str
+    start_minute: int
+    end_minute: int
+    multiplier: Decimal
+    precedence: tuple
+
+    def covers(self, day: date_cls, minute: int) -> bool:
+        if self.days == RateRule.DAYS_WEEKEND and day.weekday() < 5:
+            return False
+        if self.days == RateRule.DAYS_WEEKDAY and day.weekday() >= 5:
+            return False
+        return self.start_minute <= minute < self.end_minute
+
+
+@dataclass(frozen=True)
+class Bundle:
+    name: str
+    addon_ids: frozenset[int]
+    price: Decimal
+
+
+@dataclass(frozen=True)
+class PricingTable:
+    rules: tuple[Rule, ...]
+    deposits: dict[int, Decimal]
+    bundles: dict[int, tuple[Bundle, ...]]
+
+    def rules_for(self, venue: Venue) -> list[Rule]:
+        return [
+            rule
+            for rule in self.rules
+            if rule.venue_id in (None, venue.pk) and rule.category_id in (None, venue.category_id)
+        ]
+
+
+@dataclass(frozen=True)
+class Quote:
+    venue_total: Decimal
+    addon_total: Decimal
+    bundle_discount: Decimal
+    deposit: Decimal
+    bundles: tuple[str, ...] = ()
+
+    @property
+    def subtotal(self) -> Decimal:
+        return self.venue_total + self.addon_total - self.bundle_discount
+
+    @property
+    def grand_total(self) -> Decimal:
+        return self.subtotal + self.deposit
+
+
+@dataclass(frozen=True)
+class VenuePrices:
+    """Just enough of a venue and its add-ons to quote it; the instances are unsaved stand-ins."""
+
+    venue: Venue
+    addons: dict[int, AddOn]
+
+
+@dataclass(frozen=True)
+class RateBand:
+    start: time
+    end: time
+    price_per_hour: Decimal
+
+
+def load_table() -> PricingTable:
+    rules = []
+    for rule in RateRule.objects.order_by("pk"):
+        precedence = (
+            rule.venue_id is None,
+            rule.category_id is None,
+            rule.days == RateRule.DAYS_ANY,
+            rule.pk,
+        )
+        rules.append(
+            Rule(
+                rule.venue_id,
+                rule.category_id,
+                rule.days,
+                rule.start_hour * 60,
+                rule.end_hour * 60,
+                rule.multiplier,
+                precedence,
+            )
+        )
+    rules.sort(key=lambda rule: rule.precedence)
+
+    deposits = dict(
+        Category.objects.filter(deposit_amount__isnull=False).order_by().values_list("pk", "deposit_amount")
+    )
+
+    members: dict[int, set[int]] = defaultdict(set)
+    for bundle_id, addon_id in AddOnBundle.addons.through.objects.values_list("addonbundle_id", "addon_id"):
+        members[bundle_id].add(addon_id)
+    bundles: dict[int, list[Bundle]] = defaultdict(list)
+    for bundle in AddOnBundle.objects.order_by("pk"):
+        if members[bundle.pk]:
+            bundles[bundle.venue_id].append(Bundle(bundle.name, frozenset(members[bundle.pk]), bundle.price))
+    return PricingTable(tuple(rules), deposits, {venue_id: tuple(items) for venue_id, items in bundles.items()})
+
+
+_table: PricingTable | None = None
+_table_version: int | None = None
+_table_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _current_version() -> int:
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, 0, None)
+        version = cache.get(VERSION_CACHE_KEY, 0)
+    return version
+
+
+def get_table() -> PricingTable:
+    global _table, _table_version, _table_loaded_at
+    version = _current_version()
+    with _lock:
+        # The age check bounds staleness if the version key was evicted or the
+        # bump never reached this process's cache.
+        if _table is None or _table_version != version or monotonic() - _table_loaded_at > TABLE_TTL:
+            _table = load_table()
+            _table_version = version
+            _table_loaded_at = monotonic()
+        return _table
+
+
+def invalidate() -> None:
+    """Make every process reload the pricing table on its next quote."""
+    global _table
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.add(VERSION_CACHE_KEY, 0, None)
+    with _lock:
+        _table = None
+
+
+def _prices_key(venue_id: int) -> str:
+    return f"{PRICES_CACHE_PREFIX}:{venue_id}"
+
+
+def venue_prices(venue_id: int) -> VenuePrices | None:
+    """The venue's hourly price, category and add-on prices, from the cache when possible."""
+    cached = cache.get(_prices_key(venue_id))
+    if cached is None:
+        row = Venue.objects.filter(pk=venue_id).values_list("price_per_hour", "category_id").first()
+        if row is None:
+            return None
+        addons = tuple(AddOn.objects.filter(venue_id=venue_id).order_by("pk").values_list("pk", "price"))
+        cached = (*row, addons)
+        cache.set(_prices_key(venue_id), cached, PRICES_CACHE_TIMEOUT)
+    price_per_hour, category_id, addons = cached
+    return VenuePrices(
+        venue=Venue(pk=venue_id, price_per_hour=price_per_hour, category_id=category_id),
+        addons={addon_id: AddOn(pk=addon_id, venue_id=venue_id, price=price) for addon_id, price in addons},
+    )
+
+
+def forget_venue_prices(venue_id: int) -> None:
+    cache.delete(_prices_key(venue_id))
+
+
+def _block_prices(venue: Venue, rules: Sequence[Rule], day: date_cls, first_block: int, count: int) -> list[Decimal]:
+    """Price of each block from ``first_block`` (counted from midnight of ``day``), spilling into later days."""
+    block_price = venue.price_per_hour / BLOCKS_PER_HOUR
+    blocks_per_day = MINUTES_PER_DAY // BLOCK_MINUTES
+    prices = []
+    for block in range(first_block, first_block + count):
+        block_day = day + timedelta(days=block // blocks_per_day)
+        minute = block % blocks_per_day * BLOCK_MINUTES
+        multiplier = next((rule.multiplier for rule in rules if rule.covers(block_day, minute)), Decimal(1))
+        prices.append(block_price * multiplier)
+    return prices
+
+
+def _addon_totals(
+    table: PricingTable, venue_id: int, addons: Sequence[AddOn]
+) -> tuple[Decimal, Decimal, tuple[str, ...]]:
+    """Add-on total, bundle discount and applied bundle names; best saving first, no add-on used twice."""
+    prices = {addon.pk: addon.price for addon in addons}
+    addon_total = sum(prices.values(), Decimal("0.00"))
+    candidates = [
+        (sum(prices[addon_id] for addon_id in bundle.addon_ids) - bundle.price, bundle)
+        for bundle in table.bundles.get(venue_id, ())
+        if bundle.addon_ids <= prices.keys()
+    ]
+    used: set[int] = set()
+    discount = Decimal("0.00")
+    applied = []
+    for saving, bundle in sorted(candidates, key=lambda item: -item[0]):
+        if saving > 0 and not bundle.addon_ids & used:
+            used |= bundle.addon_ids
+            discount += saving
+            applied.append(bundle.name)
+    return addon_total, discount, tuple(applied)
+
+
+def _money(value: Decimal) -> Decimal:
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def quote(
+    venue: Venue, day: date_cls, start_time: time, duration_hours: int, addons: Iterable[AddOn] = ()
+) -> Quote:
+    """Price one booking. ``venue`` needs ``price_per_hour`` and ``category_id``; nothing is queried."""
+    table = get_table()
+    addons = list(addons)
+    start_block = (start_time.hour * 60 + start_time.minute) // BLOCK_MINUTES
+    venue_total = sum(
+        _block_prices(venue, table.rules_for(venue), day, start_block, duration_hours * BLOCKS_PER_HOUR),
+        Decimal("0.00"),
+    )
+    addon_total, discount, bundles = _addon_totals(table, venue.pk, addons)
+    return Quote(
+        venue_total=_money(venue_total),
+        addon_total=_money(addon_total),
+        bundle_discount=_money(discount),
+        deposit=table.deposits.get(venue.category_id, Booking.DEPOSIT_AMOUNT),
+        bundles=bundles,
+    )
+
+
+def quote_grid(
+    venue: Venue, day: date_cls, duration_hours: int = 1, addons: Iterable[AddOn] = ()
+) -> list[tuple[time, Quote]]:
+    """Quote every start time on ``day`` within opening hours, sliding one window over the block prices."""
+    table = get_table()
+    opening, closing = opening_minutes()
+    first, last = opening // BLOCK_MINUTES, closing // BLOCK_MINUTES
+    width = duration_hours * BLOCKS_PER_HOUR
+    prices = _block_prices(venue, table.rules_for(venue), day, first, last - first + width)
+    addon_total, discount, bundles = _addon_totals(table, venue.pk, list(addons))
+    deposit = table.deposits.get(venue.category_id, Booking.DEPOSIT_AMOUNT)
+
+    grid = []
+    window = sum(prices[:width], Decimal("0.00"))
+    for offset in range(last - first):
+        if offset:
+            window += prices[offset + width - 1] - prices[offset - 1]
+        quote_ = Quote(_money(window), _money(addon_total), _money(discount), deposit, bundles)
+        grid.append((to_time((first + offset) * BLOCK_MINUTES), quote_))
+    return grid
+
+
+def rate_bands(venue: Venue, day: date_cls) -> list[RateBand]:
+    """Opening hours of ``day`` split into runs that share one hourly price."""
+    table = get_table()
+    opening, closing = opening_minutes()
+    first, last = opening // BLOCK_MINUTES, closing // BLOCK_MINUTES
+    prices = _block_prices(venue, table.rules_for(venue), day, first, last - first)
+    bands: list[list] = []
+    for offset, price in enumerate(prices):
+        if bands and bands[-1][2] == price:
+            bands[-1][1] = first + offset + 1
+        else:
+            bands.append([first + offset, first + offset + 1, price])
+    return [
+        RateBand(to_time(start * BLOCK_MINUTES), to_time(end * BLOCK_MINUTES), _money(price * BLOCKS_PER_HOUR))
+        for start, end, price in bands
+    ]
@@ -0,0 +1,102 @@
+"""Atomic booking creation backed by database-enforced slot claims."""
+from __future__ import annotations
+
+from datetime import date as date_cls, time
+from typing import Iterable
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .availability import booking_intervals
+from .models import AddOn, Booking, SlotClaim, Venue
+from .sqlite import retry_on_locked
+
+
+class SlotUnavailable(Exception):
+    """Raised when another booking already holds part of the requested slot."""
+
+
+def claimed_slots(day: date_cls, start_time: time, duration_hours: int) -> list[tuple[date_cls, int]]:
+    slots = []
+    for part_day, (start, end) in booking_intervals(day, start_time, duration_hours):
+        first = start // SlotClaim.SLOT_MINUTES
+        last = -(-end // SlotClaim.SLOT_MINUTES)
+        slots.extend((part_day, slot) for slot in range(first, last))
+    return slots
+
+
+@retry_on_locked
+def create_booking(
+    *,
+    user: AbstractBaseUser,
+    venue: Venue,
+    date: date_cls,
+    start_time: time,
+    duration_hours: int,
+    addons: Iterable[AddOn] = (),
+    notes: str = "",
+) -> Booking:
+    """Insert a waiting booking, its add-ons and its slot claims in one transaction.
+
+    Totals are computed up front from the already loaded venue and add-ons, so
+    the booking row is written by a single INSERT. Raises ``SlotUnavailable``
+    when a concurrent or existing booking holds any of the requested slots,
+    and runs the whole transaction again if SQLite reports the database locked.
+    """
+    addons = list(addons)
+    booking = Booking(
+        user=user,
+        venue=venue,
+        date=date,
+        start_time=start_time,
+        duration_hours=duration_hours,
+        notes=notes,
+        status=Booking.STATUS_WAITING,
+    )
+    booking.calculate_totals(addons=addons, commit=False)
+
+    # retry_on_locked runs this body in one transaction.
+    booking.save(force_insert=True)
+    _claim(booking)
+    if addons:
+        Booking.addons.through.objects.bulk_create(
+            Booking.addons.through(booking=booking, addon=addon) for addon in addons
+        )
+    return booking
+
+
+def _claim(booking: Booking) -> None:
+    # Must run inside the caller's atomic block, which the exception rolls back.
+    try:
+        SlotClaim.objects.bulk_create(
+            SlotClaim(venue_id=booking.venue_id, booking=booking, date=slot_date, slot=slot)
+            for slot_date, slot in claimed_slots(booking.date, booking.start_time, booking.duration_hours)
+        )
+    except IntegrityError as exc:
+        # The claims have no other unique or check constraint, and their
+        # foreign keys are checked at commit, so this is a taken slot.
+        raise SlotUnavailable("This time slot is already booked.") from exc
+
+
+def slot_taken(venue_id: int, day: date_cls, start_time: time, duration_hours: int, exclude: int | None = None) -> bool:
+    """Whether another booking than ``exclude`` holds any of the slot's claims."""
+    by_date: dict[date_cls, list[int]] = {}
+    for slot_date, slot in claimed_slots(day, start_time, duration_hours):
+        by_date.setdefault(slot_date, []).append(slot)
+    condition = Q()
+    for slot_date, slots in by_date.items():
+        condition |= Q(date=slot_date, slot__in=slots)
+    return SlotClaim.objects.filter(condition, venue_id=venue_id).exclude(booking_id=exclude).exists()
+
+
+def reclaim(booking: Booking) -> None:
+    """Replace a saved booking's claims with those for its current slot and status.
+
+    For bookings edited outside ``create_booking``, such as in the admin.
+    Raises ``SlotUnavailable`` if another booking holds part of the new slot.
+    """
+    with transaction.atomic():
+        SlotClaim.objects.filter(booking=booking).delete()
+        if booking.status in Booking.SLOT_HOLDING_STATUSES:
+            _claim(booking)
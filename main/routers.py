@@ -0,0 +1,78 @@
+"""Primary/replica routing for the read-only pages.
+
+Views wrapped in ``read_from_replica`` run their reads against one of the
+``DATABASE_REPLICAS`` aliases, picked per request; everything else, including
+every write, stays on ``default``. Pages answered with a ``main.conditional``
+ETag pass ``settled``: their version counters move when the primary commits,
+and a body rendered from a lagging replica would be cached under the new
+ETag and revalidated as current from then on, so they render from a replica
+only once their counters have not moved for ``REPLICA_STICKY_SECONDS``. The
+ETag itself is always computed before the view runs, against the primary. A
+client that just wrote is pinned to the primary for ``REPLICA_STICKY_SECONDS``
+by ``ReplicaStickinessMiddleware``, so it reads its own writes even while the
+replicas lag. Both rely on replicas lagging less than that. Without replicas
+configured the decorator and the middleware do nothing.
+"""
+from __future__ import annotations
+
+import random
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = "ragaspace_primary"
+
+_read_alias: ContextVar[str | None] = ContextVar("ragaspace_read_alias", default=None)
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def sticky_seconds() -> int:
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+def choose_replica(request) -> str | None:
+    if getattr(request, "read_from_primary", False):
+        return None
+    aliases = replicas()
+    return random.choice(aliases) if aliases else None
+
+
+def read_from_replica(view=None, *, settled: Callable[..., bool] | None = None):
+    """Run the view's reads on a replica; ``settled``, called with the view's arguments, can veto it."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            alias = choose_replica(request)
+            if alias is None or (settled is not None and not settled(request, *args, **kwargs)):
+                return view(request, *args, **kwargs)
+            token = _read_alias.set(alias)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _read_alias.reset(token)
+
+        return wrapper
+
+    return decorator(view) if view is not None else decorator
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
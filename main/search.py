@@ -0,0 +1,304 @@
+"""Full-text venue search.
+
+On PostgreSQL the query runs against a weighted ``tsvector`` expression that
+is backed by a GIN index (see migration 0007). Everywhere else an in-process
+inverted index over the same fields is ranked with BM25. The in-process index
+is built when the WSGI application loads (or else on the first search) and
+updated incrementally from the venue signals. Other processes learn about a
+change through the shared cache version key: each bump also stores the ids of
+the venues it touched, which a process that is behind reloads and applies
+before its next search. Only a process too far behind, or one that finds a
+bump without ids (bulk imports), rebuilds from scratch.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+
+from .models import Venue
+
+FIELD_WEIGHTS = {"name": 3.0, "description": 1.0, "facilities": 1.0, "address": 1.0}
+VERSION_CACHE_KEY = "venue-search-version"
+CHANGES_CACHE_PREFIX = "venue-search-changes"
+CHANGES_TIMEOUT = 60 * 60
+# A process further behind than this rebuilds instead of replaying changes.
+MAX_PENDING_CHANGES = 200
+ALL_VENUES = "all"
+STOPWORDS = frozenset({"a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with"})
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_RE.findall(text.casefold()) if token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """Field-weighted BM25 over an in-memory postings map.
+
+    Like ``plainto_tsquery`` on PostgreSQL, every query term must match.
+    Per-term impacts (the length-normalized BM25 weight of each posting) are
+    computed on first use and dropped when a document touching the term
+    changes, so a single-term query is a slice of a presorted list and a
+    multi-term query only scores the intersection of its postings.
+    """
+
+    k1 = 1.2
+    b = 0.75
+    # Recompute every impact once the average document length has drifted
+    # this far from the value the cached impacts were computed with.
+    average_length_tolerance = 0.05
+
+    def __init__(self) -> None:
+        self.postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self.doc_terms: dict[int, tuple[str, ...]] = {}
+        self.doc_lengths: dict[int, float] = {}
+        self.total_length = 0.0
+        self._impacts: dict[str, tuple[list[tuple[float, int]], dict[int, float]]] = {}
+        self._impact_average_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, fields: dict[str, str]) -> None:
+        self.remove(doc_id)
+        frequencies: Counter[str] = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field) or ""):
+                frequencies[token] += weight
+        for term, frequency in frequencies.items():
+            self.postings[term][doc_id] = frequency
+            self._impacts.pop(term, None)
+        length = sum(frequencies.values())
+        self.doc_terms[doc_id] = tuple(frequencies)
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+
+    def remove(self, doc_id: int) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            self._impacts.pop(term, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def _average_length(self) -> float:
+        average = self.total_length / len(self.doc_lengths) or 1.0
+        reference = self._impact_average_length
+        if not reference or abs(average - reference) > reference * self.average_length_tolerance:
+            self._impacts.clear()
+            self._impact_average_length = average
+        return self._impact_average_length
+
+    def _impact(self, frequency: float, doc_id: int, average_length: float) -> float:
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+        return frequency * (self.k1 + 1) / (frequency + norm)
+
+    def _impacts_for(self, term: str, average_length: float) -> tuple[list[tuple[float, int]], dict[int, float]]:
+        cached = self._impacts.get(term)
+        if cached is None:
+            impact = self._impact
+            by_doc = {doc_id: impact(frequency, doc_id, average_length) for doc_id, frequency in self.postings[term].items()}
+            ranked = sorted(((value, doc_id) for doc_id, value in by_doc.items()), key=lambda item: (-item[0], item[1]))
+            cached = self._impacts[term] = (ranked, by_doc)
+        return cached
+
+    def search(self, query: str, limit: int) -> list[tuple[int, float]]:
+        if not self.doc_lengths:
+            return []
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or any(term not in self.postings for term in terms):
+            return []
+        doc_count = len(self.doc_lengths)
+        average_length = self._average_length()
+        lists = []
+        for term in terms:
+            document_frequency = len(self.postings[term])
+            idf = math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            lists.append((idf, *self._impacts_for(term, average_length)))
+
+        if len(lists) == 1:
+            idf, ranked, _ = lists[0]
+            return [(doc_id, idf * impact) for impact, doc_id in ranked[:limit]]
+
+        lists.sort(key=lambda item: len(item[2]))
+        candidates = lists[0][2].keys()
+        for _, _, by_doc in lists[1:]:
+            candidates = candidates & by_doc.keys()
+        first_idf, _, first = lists[0]
+        scores = {doc_id: first_idf * first[doc_id] for doc_id in candidates}
+        for idf, _, by_doc in lists[1:]:
+            for doc_id in candidates:
+                scores[doc_id] += idf * by_doc[doc_id]
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+_index: InvertedIndex | None = None
+_index_version: int | None = None
+_lock = threading.RLock()
+
+
+def reset_index() -> None:
+    """Drop the in-process index; the next search rebuilds it from the database."""
+    global _index, _index_version
+    with _lock:
+        _index = None
+        _index_version = None
+
+
+def _venue_fields(venue: Venue) -> dict[str, str]:
+    return {field: getattr(venue, field) for field in FIELD_WEIGHTS}
+
+
+def _current_version() -> int:
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, 0, None)
+        version = cache.get(VERSION_CACHE_KEY, 0)
+    return version
+
+
+def _changes_key(version: int) -> str:
+    return f"{CHANGES_CACHE_PREFIX}:{version}"
+
+
+def build_index(venues: Iterable[dict[str, str]] | None = None) -> InvertedIndex:
+    index = InvertedIndex()
+    if venues is None:
+        venues = Venue.objects.order_by().values("id", *FIELD_WEIGHTS).iterator(chunk_size=2000)
+    for row in venues:
+        index.add(row["id"], row)
+    return index
+
+
+def _pending_changes(since: int, version: int) -> set[int] | None:
+    """Venue ids changed after ``since`` up to ``version``, or None if a rebuild is needed."""
+    if not since < version <= since + MAX_PENDING_CHANGES:
+        return None
+    keys = [_changes_key(number) for number in range(since + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys) or ALL_VENUES in changes.values():
+        return None
+    return {venue_id for venue_ids in changes.values() for venue_id in venue_ids}
+
+
+def _apply_changes(index: InvertedIndex, venue_ids: set[int]) -> None:
+    rows = {row["id"]: row for row in Venue.objects.filter(pk__in=venue_ids).values("id", *FIELD_WEIGHTS)}
+    for venue_id in venue_ids:
+        if venue_id in rows:
+            index.add(venue_id, rows[venue_id])
+        else:
+            index.remove(venue_id)
+
+
+def _get_index() -> InvertedIndex:
+    global _index, _index_version
+    version = _current_version()
+    with _lock:
+        if _index is not None and _index_version == version:
+            return _index
+        changed = None
+        if _index is not None and _index_version is not None:
+            changed = _pending_changes(_index_version, version)
+        if changed is None:
+            _index = build_index()
+        else:
+            _apply_changes(_index, changed)
+        _index_version = version
+        return _index
+
+
+def warm_index() -> None:
+    """Build the in-process index now, so a worker's first search does not pay for it."""
+    if connection.vendor == "postgresql":
+        return
+    try:
+        _get_index()
+    except DatabaseError:
+        # Not migrated yet; the first search builds the index instead.
+        pass
+    finally:
+        # Forked workers must not share this connection.
+        connection.close()
+
+
+def publish_changes(venue_ids: Iterable[int] | None = None) -> int | None:
+    """Bump the shared version, recording which venues changed (None: all of them)."""
+    try:
+        version = cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.add(VERSION_CACHE_KEY, 0, None)
+        return None
+    changes = ALL_VENUES if venue_ids is None else tuple(venue_ids)
+    cache.set(_changes_key(version), changes, CHANGES_TIMEOUT)
+    return version
+
+
+def bump_version(venue_ids: Iterable[int] | None = None) -> None:
+    """Tell other processes what changed; stay current ourselves if we were current."""
+    global _index_version
+    version = publish_changes(venue_ids)
+    with _lock:
+        if version is None:
+            _index_version = None
+        elif _index_version is not None and version == _index_version + 1:
+            _index_version = version
+
+
+def index_venue(venue: Venue) -> None:
+    with _lock:
+        if _index is not None:
+            _index.add(venue.pk, _venue_fields(venue))
+    if connection.vendor != "postgresql":
+        bump_version([venue.pk])
+
+
+def remove_venue(venue_id: int) -> None:
+    with _lock:
+        if _index is not None:
+            _index.remove(venue_id)
+    if connection.vendor != "postgresql":
+        bump_version([venue_id])
+
+
+def _postgresql_search(query: str, limit: int) -> list[int]:
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    search_query = SearchQuery(query, config="simple", search_type="plain")
+    return list(
+        Venue.objects.annotate(search=venue_search_vector())
+        .filter(search=search_query)
+        .annotate(rank=SearchRank(venue_search_vector(), search_query))
+        .order_by("-rank", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+
+
+def venue_search_vector():
+    """The weighted document expression; must match the GIN index in migration 0007."""
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector("name", weight="A", config="simple") + SearchVector(
+        "description", "facilities", "address", weight="B", config="simple"
+    )
+
+
+def search_venue_ids(query: str, limit: int = 500) -> list[int]:
+    """Venue ids matching ``query``, best match first."""
+    if not query.strip():
+        return []
+    if connection.vendor == "postgresql":
+        return _postgresql_search(query, limit)
+    index = _get_index()
+    with _lock:
+        return [doc_id for doc_id, _ in index.search(query, limit)]
@@ -0,0 +1,174 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import availability, conditional, counters, facets, pricing, search, sqlite, wishlists
+from .models import AddOn, AddOnBundle, Booking, Category, RateRule, Review, Venue, WishlistItem
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_availability(sender, instance: Booking, **kwargs) -> None:
+    slots = {(instance.venue_id, instance.date, instance.start_time, instance.duration_hours)}
+    # post_save runs before Booking.save() records the new values, so an edit
+    # that moved the booking still reports the slot it left.
+    previous = instance.loaded_slot
+    if previous is not None:
+        slots.add((previous["venue_id"], previous["date"], previous["start_time"], previous["duration_hours"]))
+
+    def invalidate() -> None:
+        for slot in slots:
+            availability.invalidate(*slot)
+
+    transaction.on_commit(invalidate)
+
+
+def _counts(venue_id: int, status: str) -> dict[int, int]:
+    # Only slot-holding bookings count; an expired one was never paid for.
+    return {venue_id: 1} if status in Booking.SLOT_HOLDING_STATUSES else {}
+
+
+@receiver(post_save, sender=Booking)
+def count_booking(sender, instance: Booking, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    previous = instance.loaded_slot
+    if created:
+        before = {}
+    elif previous is not None:
+        before = _counts(previous["venue_id"], previous["status"])
+    else:
+        return
+    after = _counts(instance.venue_id, instance.status)
+    for venue_id in before.keys() | after.keys():
+        delta = after.get(venue_id, 0) - before.get(venue_id, 0)
+        if delta:
+            counters.adjust(venue_id, booking_count=delta)
+
+
+@receiver(post_delete, sender=Booking)
+def uncount_booking(sender, instance: Booking, **kwargs) -> None:
+    if instance.status in Booking.SLOT_HOLDING_STATUSES:
+        counters.adjust(instance.venue_id, booking_count=-1)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance: Review, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    if created:
+        counters.adjust(
+            instance.venue_id, review_count=1, rating_sum=instance.rating, **{f"rating_{instance.rating}": 1}
+        )
+    else:
+        # Edits are rare (admin only) and the previous rating is unknown here.
+        counters.rebuild(Venue.objects.filter(pk=instance.venue_id))
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance: Review, **kwargs) -> None:
+    counters.adjust(
+        instance.venue_id, review_count=-1, rating_sum=-instance.rating, **{f"rating_{instance.rating}": -1}
+    )
+
+
+@receiver(post_save, sender=WishlistItem)
+def count_wishlist_item(sender, instance: WishlistItem, created: bool, raw: bool = False, **kwargs) -> None:
+    if created and not raw:
+        counters.adjust(instance.venue_id, wishlist_count=1)
+        transaction.on_commit(lambda: wishlists.forget(instance.user_id))
+
+
+@receiver(post_delete, sender=WishlistItem)
+def uncount_wishlist_item(sender, instance: WishlistItem, **kwargs) -> None:
+    counters.adjust(instance.venue_id, wishlist_count=-1)
+    transaction.on_commit(lambda: wishlists.forget(instance.user_id))
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_facets(sender, **kwargs) -> None:
+    transaction.on_commit(facets.invalidate)
+
+
+@receiver(post_save, sender=Venue)
+def index_venue(sender, instance: Venue, raw: bool = False, **kwargs) -> None:
+    if not raw:
+        transaction.on_commit(lambda: search.index_venue(instance))
+
+
+@receiver(post_delete, sender=Venue)
+def unindex_venue(sender, instance: Venue, **kwargs) -> None:
+    venue_id = instance.pk
+    transaction.on_commit(lambda: search.remove_venue(venue_id))
+
+
+@receiver(post_save, sender=Category)
+def touch_category_venues(sender, instance: Category, created: bool, raw: bool = False, **kwargs) -> None:
+    # Venue.updated_at keys the card fragments, which render the category name.
+    if not created and not raw:
+        Venue.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=AddOn)
+@receiver(post_delete, sender=AddOn)
+def touch_addon_venue(sender, instance: AddOn, raw: bool = False, **kwargs) -> None:
+    if not raw:
+        Venue.objects.filter(pk=instance.venue_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_venue_pages(sender, **kwargs) -> None:
+    transaction.on_commit(lambda: conditional.bump(conditional.VENUES))
+
+
+@receiver(post_save, sender=AddOn)
+@receiver(post_delete, sender=AddOn)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_venue_detail_page(sender, instance, **kwargs) -> None:
+    venue_id = instance.venue_id
+    transaction.on_commit(lambda: conditional.bump(conditional.venue(venue_id)))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def bump_popularity(sender, **kwargs) -> None:
+    transaction.on_commit(lambda: conditional.bump(conditional.POPULARITY))
+
+
+@receiver(post_save, sender=RateRule)
+@receiver(post_delete, sender=RateRule)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=AddOnBundle)
+@receiver(post_delete, sender=AddOnBundle)
+@receiver(m2m_changed, sender=AddOnBundle.addons.through)
+def invalidate_pricing(sender, **kwargs) -> None:
+    transaction.on_commit(pricing.invalidate)
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+def forget_venue_prices(sender, instance: Venue, **kwargs) -> None:
+    venue_id = instance.pk
+    transaction.on_commit(lambda: pricing.forget_venue_prices(venue_id))
+
+
+@receiver(post_save, sender=AddOn)
+@receiver(post_delete, sender=AddOn)
+def forget_addon_prices(sender, instance: AddOn, **kwargs) -> None:
+    venue_id = instance.venue_id
+    transaction.on_commit(lambda: pricing.forget_venue_prices(venue_id))
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs) -> None:
+    sqlite.apply_pragmas(connection)
@@ -0,0 +1,80 @@
+"""SQLite tuning for single-node deployments.
+
+``apply_pragmas`` runs on every new SQLite connection (see ``main.signals``)
+with ``DEFAULT_PRAGMAS`` updated by the ``SQLITE_PRAGMAS`` setting. WAL lets
+readers proceed while one writer commits, and ``busy_timeout`` makes a second
+writer wait for the lock instead of failing at once. ``retry_on_locked``
+covers what is left: a write transaction that still times out is rolled
+back and run again from the start.
+"""
+from __future__ import annotations
+
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    # Durable across application crashes; only an OS crash can lose the last commits.
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "temp_store": "memory",
+    "mmap_size": 128 * 1024 * 1024,
+    # Negative means KiB rather than pages.
+    "cache_size": -32000,
+}
+LOCKED_MESSAGES = ("database is locked", "database table is locked")
+RETRY_ATTEMPTS = 4
+RETRY_DELAY = 0.05
+
+
+def pragmas() -> dict:
+    return {**DEFAULT_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+
+
+def apply_pragmas(connection) -> None:
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas().items():
+            if value is not None:
+                cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def is_locked_error(exc: BaseException) -> bool:
+    return isinstance(exc, OperationalError) and any(message in str(exc) for message in LOCKED_MESSAGES)
+
+
+def retry_on_locked(
+    func=None, *, attempts: int = RETRY_ATTEMPTS, delay: float = RETRY_DELAY, using: str = DEFAULT_DB_ALIAS
+):
+    """Run ``func`` in one transaction, re-running it when SQLite reports the database as locked.
+
+    Every attempt is atomic, so signal-driven writes such as counter updates
+    roll back with the rest and a retry cannot repeat a write that already
+    committed. Decorate the write itself rather than a whole view, which would
+    hold the write lock while rendering. Only retries outside a transaction (a
+    failed statement inside one leaves it unusable) and with jittered
+    exponential backoff, so workers that collided once do not collide again in
+    lockstep.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    with transaction.atomic(using=using):
+                        return func(*args, **kwargs)
+                except OperationalError as exc:
+                    connection = connections[using]
+                    if attempt == attempts - 1 or connection.in_atomic_block or not is_locked_error(exc):
+                        raise
+                    time.sleep(delay * 2**attempt * random.uniform(0.5, 1.5))
+
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
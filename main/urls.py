@@ -9,6 +9,9 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
     path("home/", views.home_view, name="home"),
     path("catalog/", views.catalog_view, name="catalog"),
+    path("api/venues/", views.venue_list_api, name="venue_list_api"),
+    path("api/venues/<int:pk>/reviews/", views.venue_reviews_api, name="venue_reviews_api"),
+    path("api/venues/<int:pk>/quote/", views.booking_quote_api, name="booking_quote_api"),
     path("venue/<int:pk>/", views.venue_detail_view, name="venue_detail"),
     path("venue/<int:pk>/book/", views.booking_view, name="booking"),
     path("venue/<int:pk>/add-review/", views.add_review, name="add_review"),
@@ -16,4 +19,5 @@ urlpatterns = [
     path("wishlist/toggle/<int:venue_id>/", views.wishlist_toggle, name="wishlist_toggle"),
     path("booking/<int:pk>/payment/", views.booking_payment_view, name="booking_payment"),
     path("booking/<int:pk>/success/", views.booking_success_view, name="booking_success"),
+    path("metrics/", views.metrics_view, name="metrics"),
 ]
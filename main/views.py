@@ -1,28 +1,52 @@
 from __future__ import annotations
 
+import hmac
 from typing import Iterable
 
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.views.decorators.http import require_POST
-from django.db.models import Count, Prefetch
-
-from .forms import BookingForm, LoginForm, PaymentForm, RegisterForm, ReviewForm
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+
+from . import availability, conditional, expiry, fragments, metrics, pricing, wishlists
+from .facets import get_facets
+from .forms import BookingForm, LoginForm, PaymentForm, QuoteForm, RegisterForm, ReviewForm
 from .models import Booking, Review, Venue, WishlistItem
+from .pagination import KeysetPage, keyset_paginate, ranked_paginate
+from .search import search_venue_ids
+from .reservations import SlotUnavailable, create_booking
+from .routers import read_from_replica
+from .sqlite import retry_on_locked
+
+CATALOG_ORDERING = ("name", "id")
+CATALOG_PAGE_SIZE = 12
+CATALOG_API_MAX_LIMIT = 50
+SEARCH_RESULT_LIMIT = 500
+REVIEW_ORDERING = ("-created_at", "-id")
+REVIEW_PAGE_SIZE = 10
+REVIEW_API_MAX_LIMIT = 50
 
 
 def _apply_filters(queryset: Iterable[Venue], request: HttpRequest):
     city = request.GET.get("city")
     category = request.GET.get("category")
     max_price = request.GET.get("max_price")
+    # Compare LOWER() on both sides instead of using iexact so the functional
+    # indexes on Lower("city") and Lower("name") can serve these filters.
     if city:
-        queryset = queryset.filter(city__iexact=city)
+        queryset = queryset.filter(Exact(Lower("city"), Lower(Value(city))))
     if category:
-        queryset = queryset.filter(category__name__iexact=category)
+        queryset = queryset.filter(Exact(Lower("category__name"), Lower(Value(category))))
     if max_price:
         try:
             queryset = queryset.filter(price_per_hour__lte=float(max_price))
@@ -31,6 +55,28 @@ def _apply_filters(queryset: Iterable[Venue], request: HttpRequest):
     return queryset
 
 
+def _paginate_venues(queryset, request: HttpRequest, size: int) -> KeysetPage:
+    cursor = request.GET.get("cursor")
+    query = request.GET.get("q", "").strip()
+    if query:
+        return ranked_paginate(
+            queryset, lambda limit: search_venue_ids(query, limit), cursor, size=size, batch=SEARCH_RESULT_LIMIT
+        )
+    return keyset_paginate(queryset, cursor, ordering=CATALOG_ORDERING, size=size)
+
+
+def _filter_context(request: HttpRequest) -> dict:
+    return {
+        "filters": {
+            "q": request.GET.get("q", ""),
+            "city": request.GET.get("city", ""),
+            "category": request.GET.get("category", ""),
+            "max_price": request.GET.get("max_price", ""),
+        },
+        "facets": get_facets(),
+    }
+
+
 def redirect_to_login(request: HttpRequest) -> HttpResponse:
     if request.user.is_authenticated:
         return redirect("home")
@@ -72,8 +118,11 @@ def logout_view(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.home_etag)
+@read_from_replica(settled=conditional.home_settled)
 def home_view(request: HttpRequest) -> HttpResponse:
-    venues = Venue.objects.select_related("category").annotate(booking_count=Count("bookings"))
+    venues = Venue.objects.select_related("category")
     filtered_venues = _apply_filters(venues, request)
 
     popular_venues = (
@@ -83,92 +132,205 @@ def home_view(request: HttpRequest) -> HttpResponse:
     )
 
     context = {
-        "popular_venues": popular_venues,
-        "filters": {
-            "city": request.GET.get("city", ""),
-            "category": request.GET.get("category", ""),
-            "max_price": request.GET.get("max_price", ""),
-        },
-        "available_cities": Venue.objects.values_list("city", flat=True).distinct().order_by("city"),
-        "available_categories": Venue.objects.values_list("category__name", flat=True).distinct().order_by("category__name"),
+        "popular_venues": fragments.attach_cards(popular_venues),
+        "wishlist_ids": wishlists.venue_ids(request),
+        **_filter_context(request),
     }
     return render(request, "main/home.html", context)
 
 
+def _venue_card(venue: Venue, include_addons: bool = False) -> dict:
+    card = {
+        "id": venue.pk,
+        "name": venue.name,
+        "city": venue.city,
+        "category": venue.category.name,
+        "price_per_hour": str(venue.price_per_hour),
+        "image_url": venue.image_url,
+        "url": reverse("venue_detail", args=[venue.pk]),
+    }
+    if include_addons:
+        card["addons"] = [{"id": addon.pk, "name": addon.name, "price": str(addon.price)} for addon in venue.addons.all()]
+    return card
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.catalog_etag)
+@read_from_replica(settled=conditional.catalog_settled)
 def catalog_view(request: HttpRequest) -> HttpResponse:
-    venues = (
-        Venue.objects.select_related("category")
-        .prefetch_related("addons")
-        .annotate(booking_count=Count("bookings"))
-    )
-    venues = _apply_filters(venues, request)
+    venues = _apply_filters(Venue.objects.select_related("category"), request)
+    page = _paginate_venues(venues, request, CATALOG_PAGE_SIZE)
+
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    first_url = f"{reverse('catalog')}?{query.urlencode()}" if request.GET.get("cursor") else None
+    next_url = None
+    if page.has_next:
+        query["cursor"] = page.next_cursor
+        next_url = f"{reverse('catalog')}?{query.urlencode()}"
     context = {
-        "venues": venues,
-        "filters": {
-            "city": request.GET.get("city", ""),
-            "category": request.GET.get("category", ""),
-            "max_price": request.GET.get("max_price", ""),
-        },
-        "available_cities": Venue.objects.values_list("city", flat=True).distinct().order_by("city"),
-        "available_categories": Venue.objects.values_list("category__name", flat=True).distinct().order_by("category__name"),
+        "venues": fragments.attach_cards(page.items),
+        "wishlist_ids": wishlists.venue_ids(request),
+        "first_url": first_url,
+        "next_url": next_url,
+        **_filter_context(request),
     }
     return render(request, "main/catalog.html", context)
 
 
 @login_required
-def venue_detail_view(request: HttpRequest, pk: int) -> HttpResponse:
-    venue = (
-        Venue.objects.select_related("category")
-        .prefetch_related("addons", Prefetch("reviews", queryset=Review.objects.select_related("user")))
-        .annotate(booking_count=Count("bookings"))
-        .get(pk=pk)
+@read_from_replica
+def venue_list_api(request: HttpRequest) -> JsonResponse:
+    include_addons = "addons" in request.GET.getlist("include")
+    try:
+        limit = min(max(int(request.GET.get("limit", CATALOG_PAGE_SIZE)), 1), CATALOG_API_MAX_LIMIT)
+    except ValueError:
+        limit = CATALOG_PAGE_SIZE
+
+    venues = Venue.objects.select_related("category").only(
+        "id", "name", "city", "price_per_hour", "image_url", "category__name"
     )
-    review_form = ReviewForm()
-    is_wishlisted = WishlistItem.objects.filter(user=request.user, venue=venue).exists()
+    if include_addons:
+        venues = venues.prefetch_related("addons")
+    venues = _apply_filters(venues, request)
+    page = _paginate_venues(venues, request, limit)
+    return JsonResponse(
+        {
+            "results": [_venue_card(venue, include_addons) for venue in page.items],
+            "next_cursor": page.next_cursor,
+        }
+    )
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conditional.venue_detail_etag)
+@read_from_replica(settled=conditional.venue_detail_settled)
+def venue_detail_view(request: HttpRequest, pk: int) -> HttpResponse:
+    venue = get_object_or_404(Venue.objects.select_related("category"), pk=pk)
+    reviews = _review_page(venue.pk, request.GET.get("reviews"), REVIEW_PAGE_SIZE)
     context = {
         "venue": venue,
-        "review_form": review_form,
-        "is_wishlisted": is_wishlisted,
+        "reviews": reviews.items,
+        "reviews_next_cursor": reviews.next_cursor,
+        "review_form": ReviewForm(),
+        "is_wishlisted": venue.pk in wishlists.venue_ids(request),
     }
     return render(request, "main/venue_detail.html", context)
 
 
+def _review_page(venue_id: int, cursor: str | None, size: int) -> KeysetPage:
+    reviews = Review.objects.filter(venue_id=venue_id).select_related("user")
+    return keyset_paginate(reviews, cursor, ordering=REVIEW_ORDERING, size=size)
+
+
+def _review_card(review: Review) -> dict:
+    return {
+        "id": review.pk,
+        "user": review.user.username,
+        "rating": review.rating,
+        "comment": review.comment,
+        "created_at": review.created_at.isoformat(),
+    }
+
+
+@login_required
+@read_from_replica
+def venue_reviews_api(request: HttpRequest, pk: int) -> JsonResponse:
+    venue = get_object_or_404(
+        Venue.objects.only("review_count", "rating_sum", *(f"rating_{stars}" for stars in range(1, 6))), pk=pk
+    )
+    try:
+        limit = min(max(int(request.GET.get("limit", REVIEW_PAGE_SIZE)), 1), REVIEW_API_MAX_LIMIT)
+    except ValueError:
+        limit = REVIEW_PAGE_SIZE
+    page = _review_page(venue.pk, request.GET.get("cursor"), limit)
+    return JsonResponse(
+        {
+            "rating": {
+                "average": venue.rating_avg,
+                "count": venue.review_count,
+                "histogram": {str(stars): count for stars, count in venue.rating_histogram},
+            },
+            "results": [_review_card(review) for review in page.items],
+            "next_cursor": page.next_cursor,
+        }
+    )
+
+
+@retry_on_locked
+def _create_review(user, venue: Venue, rating: int, comment: str) -> Review:
+    # The counter update in post_save commits or rolls back with the review.
+    return Review.objects.create(user=user, venue=venue, rating=rating, comment=comment)
+
+
 @login_required
 @require_POST
 def add_review(request: HttpRequest, pk: int) -> HttpResponse:
     venue = get_object_or_404(Venue, pk=pk)
     form = ReviewForm(request.POST)
     if form.is_valid():
-        Review.objects.create(
-            user=request.user,
-            venue=venue,
-            rating=form.cleaned_data["rating"],
-            comment=form.cleaned_data["comment"],
-        )
+        _create_review(request.user, venue, form.cleaned_data["rating"], form.cleaned_data["comment"])
         messages.success(request, "Review added successfully.")
     else:
         messages.error(request, "Could not add review. Please check the form and try again.")
     return redirect("venue_detail", pk=venue.pk)
 
 
+@retry_on_locked
+def _toggle_wishlist(request: HttpRequest, venue_id: int, venue_exists: bool = False) -> bool:
+    """Flip the wishlist state of ``venue_id`` and return whether it is now wishlisted.
+
+    The cached wishlist set decides which write to try, so removing is one
+    filtered delete (a SELECT then a DELETE, since post_delete receivers are
+    connected) and adding an existence check plus one INSERT, with no
+    get_or_create round trip. Foreign keys are only checked at commit on some
+    backends, hence the explicit check before inserting.
+    """
+    if venue_id in wishlists.venue_ids(request):
+        deleted, _ = WishlistItem.objects.filter(user=request.user, venue_id=venue_id).delete()
+        if deleted:
+            return False
+    if not venue_exists and not Venue.objects.filter(pk=venue_id).exists():
+        raise Http404("No Venue matches the given query.")
+    try:
+        with transaction.atomic():
+            WishlistItem.objects.create(user=request.user, venue_id=venue_id)
+    except IntegrityError:
+        # The cached set was stale: the venue was already wishlisted.
+        WishlistItem.objects.filter(user=request.user, venue_id=venue_id).delete()
+        return False
+    return True
+
+
+def _wants_json(request: HttpRequest) -> bool:
+    return request.headers.get("Accept", "").startswith("application/json")
+
+
 @login_required
 @require_POST
 def wishlist_toggle(request: HttpRequest, venue_id: int) -> HttpResponse:
-    venue = get_object_or_404(Venue, pk=venue_id)
-    wishlist_item, created = WishlistItem.objects.get_or_create(user=request.user, venue=venue)
-    if not created:
-        wishlist_item.delete()
-        messages.info(request, f"Removed {venue.name} from your wishlist.")
-    else:
+    if _wants_json(request):
+        previous = wishlists.venue_ids(request)
+        wishlisted = _toggle_wishlist(request, venue_id)
+        current = previous | {venue_id} if wishlisted else previous - {venue_id}
+        return JsonResponse({"venue": venue_id, "wishlisted": wishlisted, "wishlist_count": len(current)})
+
+    venue = get_object_or_404(Venue.objects.only("name"), pk=venue_id)
+    if _toggle_wishlist(request, venue_id, venue_exists=True):
         messages.success(request, f"Added {venue.name} to your wishlist.")
+    else:
+        messages.info(request, f"Removed {venue.name} from your wishlist.")
     next_url = request.POST.get("next") or reverse("home")
     return redirect(next_url)
 
 
 @login_required
+@read_from_replica
 def wishlist_view(request: HttpRequest) -> HttpResponse:
-    items = WishlistItem.objects.select_related("venue", "venue__category").filter(user=request.user)
+    items = list(WishlistItem.objects.select_related("venue", "venue__category").filter(user=request.user))
+    fragments.attach_cards(item.venue for item in items)
     return render(request, "main/wishlist.html", {"items": items})
 
 
@@ -178,35 +340,97 @@ def booking_view(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method == "POST":
         form = BookingForm(request.POST, venue=venue)
         if form.is_valid():
-            booking = form.save(commit=False)
-            booking.user = request.user
-            booking.venue = venue
-            booking.status = Booking.STATUS_WAITING
-            booking.save()
-            form.save_m2m()
-            booking.calculate_totals()
-            messages.info(request, "Booking created. Please complete the payment to confirm.")
-            return redirect("booking_payment", pk=booking.pk)
+            try:
+                booking = create_booking(
+                    user=request.user,
+                    venue=venue,
+                    date=form.cleaned_data["date"],
+                    start_time=form.cleaned_data["start_time"],
+                    duration_hours=form.cleaned_data["duration_hours"],
+                    addons=form.cleaned_data["addons"],
+                    notes=form.cleaned_data["notes"],
+                )
+            except SlotUnavailable as exc:
+                form.add_error(None, str(exc))
+            else:
+                messages.info(request, "Booking created. Please complete the payment to confirm.")
+                return redirect("booking_payment", pk=booking.pk)
     else:
         form = BookingForm(venue=venue)
 
+    price_date = (form.cleaned_data.get("date") if form.is_bound else None) or timezone.localdate()
     context = {
         "venue": venue,
         "form": form,
+        "free_slots": availability.free_slots(venue.pk, days=7),
+        "price_date": price_date,
+        "rate_bands": pricing.rate_bands(venue, price_date),
     }
     return render(request, "main/booking_form.html", context)
 
 
+@login_required
+@require_GET
+def booking_quote_api(request: HttpRequest, pk: int) -> JsonResponse:
+    """Price a prospective booking without touching the database once the price caches are warm."""
+    prices = pricing.venue_prices(pk)
+    if prices is None:
+        raise Http404
+    form = QuoteForm(request.GET, addon_ids=prices.addons)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+    data = form.cleaned_data
+    addon_ids = sorted(set(data["addons"]))
+    quote = pricing.quote(
+        prices.venue,
+        data["date"],
+        data["start_time"],
+        data["duration_hours"],
+        [prices.addons[addon_id] for addon_id in addon_ids],
+    )
+    return JsonResponse(
+        {
+            "venue": pk,
+            "date": data["date"],
+            "start_time": data["start_time"],
+            "duration_hours": data["duration_hours"],
+            "addons": addon_ids,
+            "available": availability.is_slot_free(pk, data["date"], data["start_time"], data["duration_hours"]),
+            "venue_total": quote.venue_total,
+            "addon_total": quote.addon_total,
+            "bundle_discount": quote.bundle_discount,
+            "bundles": quote.bundles,
+            "subtotal": quote.subtotal,
+            "deposit": quote.deposit,
+            "grand_total": quote.grand_total,
+        }
+    )
+
+
+@retry_on_locked
+def _confirm_payment(booking: Booking, payment_method: str) -> bool:
+    # Conditional so a payment racing the reaper cannot revive a booking whose slots were released.
+    return bool(
+        Booking.objects.filter(pk=booking.pk)
+        .exclude(status=Booking.STATUS_EXPIRED)
+        .exclude(status=Booking.STATUS_WAITING, created_at__lt=expiry.cutoff())
+        .update(payment_method=payment_method, status=Booking.STATUS_CONFIRMED)
+    )
+
+
 @login_required
 def booking_payment_view(request: HttpRequest, pk: int) -> HttpResponse:
     booking = get_object_or_404(
         Booking.objects.select_related("venue", "venue__category").prefetch_related("addons"), pk=pk, user=request.user
     )
+    if expiry.is_expired(booking):
+        messages.error(request, "This booking expired before it was paid. Please book the slot again.")
+        return redirect("booking", pk=booking.venue_id)
     form = PaymentForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
-        booking.payment_method = form.cleaned_data["payment_method"]
-        booking.status = Booking.STATUS_CONFIRMED
-        booking.save(update_fields=["payment_method", "status"])
+        if not _confirm_payment(booking, form.cleaned_data["payment_method"]):
+            messages.error(request, "This booking expired before it was paid. Please book the slot again.")
+            return redirect("booking", pk=booking.venue_id)
         messages.success(request, "Payment confirmed! Enjoy your game.")
         return redirect("booking_success", pk=booking.pk)
 
@@ -226,3 +450,18 @@ def booking_success_view(request: HttpRequest, pk: int) -> HttpResponse:
         Booking.objects.select_related("venue", "venue__category"), pk=pk, user=request.user
     )
     return render(request, "main/booking_success.html", {"booking": booking})
+
+
+def _has_metrics_token(request: HttpRequest) -> bool:
+    # Not REMOTE_ADDR: behind a local reverse proxy every client is 127.0.0.1.
+    token = getattr(settings, "METRICS_TOKEN", "")
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip(), token)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    if not getattr(settings, "METRICS_ENABLED", False):
+        raise Http404
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        raise Http404
+    return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
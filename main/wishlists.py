@@ -0,0 +1,43 @@
+"""Per-user sets of wishlisted venue ids.
+
+The set is loaded at most once per request and kept in the cache between
+requests, so listings can mark every heart with a set lookup and no query.
+Wishlist writes drop the cached set (see ``main.signals``) rather than
+rewriting it: a read-modify-write would let two concurrent toggles lose one
+update, while a delete cannot go wrong and costs one query on the next read.
+"""
+from __future__ import annotations
+
+from django.core.cache import cache
+from django.http import HttpRequest
+
+from .models import WishlistItem
+
+CACHE_PREFIX = "wishlist-ids"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:{user_id}"
+
+
+def venue_ids_for_user(user_id: int) -> frozenset[int]:
+    key = _cache_key(user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(WishlistItem.objects.filter(user_id=user_id).values_list("venue_id", flat=True))
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
+
+
+def venue_ids(request: HttpRequest) -> frozenset[int]:
+    """The current user's wishlisted venue ids, memoized on the request."""
+    if not request.user.is_authenticated:
+        return frozenset()
+    if not hasattr(request, "_wishlist_venue_ids"):
+        request._wishlist_venue_ids = venue_ids_for_user(request.user.pk)
+    return request._wishlist_venue_ids
+
+
+def forget(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
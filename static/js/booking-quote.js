@@ -0,0 +1,32 @@
+// Re-quote as the schedule or add-ons change; the quote endpoint never writes.
+(() => {
+    const panel = document.getElementById("booking-quote");
+    if (!panel) {
+        return;
+    }
+    const form = panel.closest("form");
+    const money = new Intl.NumberFormat("id-ID", {maximumFractionDigits: 0});
+    let pending;
+    const refresh = async () => {
+        const params = new URLSearchParams(new FormData(form));
+        params.delete("csrfmiddlewaretoken");
+        params.delete("notes");
+        const request = pending = fetch(`${panel.dataset.api}?${params}`, {headers: {"Accept": "application/json"}});
+        const response = await request;
+        if (request !== pending) {
+            return;
+        }
+        if (!response.ok) {
+            panel.classList.add("d-none");
+            return;
+        }
+        const quote = await response.json();
+        for (const cell of panel.querySelectorAll("[data-quote]")) {
+            cell.textContent = `Rp${money.format(quote[cell.dataset.quote])}`;
+        }
+        panel.querySelector("[data-quote-unavailable]").classList.toggle("d-none", quote.available);
+        panel.classList.remove("d-none");
+    };
+    form.addEventListener("change", refresh);
+    refresh();
+})();
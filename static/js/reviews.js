@@ -0,0 +1,31 @@
+// Append the next page of reviews in place; without JS the link reloads at the cursor.
+document.getElementById("more-reviews")?.addEventListener("click", async (event) => {
+    const link = event.currentTarget;
+    event.preventDefault();
+    const response = await fetch(`${link.dataset.api}?cursor=${encodeURIComponent(link.dataset.cursor)}`, {
+        headers: {"Accept": "application/json"},
+    });
+    if (!response.ok) {
+        window.location = link.href;
+        return;
+    }
+    const data = await response.json();
+    const container = document.getElementById("reviews");
+    const dateFormat = new Intl.DateTimeFormat("en-US", {month: "short", day: "2-digit", year: "numeric"});
+    for (const review of data.results) {
+        const item = document.createElement("div");
+        item.className = "border-top pt-3 mt-3";
+        item.innerHTML = `<div class="d-flex justify-content-between"><strong></strong><span class="badge bg-warning text-dark"></span></div><p class="mb-1"></p><small class="text-muted"></small>`;
+        item.querySelector("strong").textContent = review.user;
+        item.querySelector(".badge").textContent = `${review.rating}/5`;
+        item.querySelector("p").textContent = review.comment;
+        item.querySelector("small").textContent = dateFormat.format(new Date(review.created_at));
+        container.append(item);
+    }
+    if (data.next_cursor) {
+        link.dataset.cursor = data.next_cursor;
+        link.href = `?reviews=${data.next_cursor}`;
+    } else {
+        link.remove();
+    }
+});
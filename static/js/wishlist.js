@@ -0,0 +1,35 @@
+// Wishlist hearts toggle in place; the plain form post stays as the fallback.
+document.addEventListener("submit", async (event) => {
+    const form = event.target.closest("form[data-wishlist-toggle]");
+    if (!form) return;
+    event.preventDefault();
+    let response;
+    try {
+        response = await fetch(form.action, {
+            method: "POST",
+            headers: {"Accept": "application/json"},
+            body: new FormData(form),
+            credentials: "same-origin",
+        });
+    } catch (error) {
+        form.submit();
+        return;
+    }
+    if (!response.ok) {
+        // Nothing was toggled; let the regular post show what went wrong.
+        form.submit();
+        return;
+    }
+    if (!(response.headers.get("Content-Type") || "").startsWith("application/json")) {
+        // The toggle went through; posting again would undo it.
+        window.location.reload();
+        return;
+    }
+    const data = await response.json();
+    const button = form.querySelector("button");
+    button.classList.toggle("btn-danger", data.wishlisted);
+    button.classList.toggle("btn-outline-danger", !data.wishlisted);
+    if (button.dataset.labelOn) {
+        button.textContent = data.wishlisted ? button.dataset.labelOn : button.dataset.labelOff;
+    }
+});